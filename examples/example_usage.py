@@ -7,21 +7,21 @@ Run this example with:
 
 import asyncio
 import json
+from contextlib import aclosing
 from datetime import date, timedelta
 
-from src.amadeus_client import AmadeusClient
+from src.amadeus_client import get_amadeus_client, close_amadeus_client
 from src.models import HotelsListRequest, HotelOffersRequest
 
+# Computed once; all example dates are offsets from today
+TODAY = date.today()
+
 
 async def example_hotel_search():
     """Example of searching for hotels and getting offers."""
     
-    # Initialize client (you'll need to set your actual API credentials)
-    client = AmadeusClient(
-        api_key="your_api_key_here",
-        api_secret="your_api_secret_here",
-        base_url="https://test.api.amadeus.com"
-    )
+    # Get the shared client (credentials are read from the environment / .env)
+    client = get_amadeus_client()
     
     print("🔍 Searching for hotels near Times Square, NYC...")
     
@@ -35,10 +35,16 @@ async def example_hotel_search():
     )
     
     try:
-        hotels_response = await client.search_hotels_by_location(hotels_request)
+        # Stream the results and stop after the first 3 hotels
+        hotels = []
+        async with aclosing(client.search_hotels_by_location_stream(hotels_request)) as stream:
+            async for hotel in stream:
+                hotels.append(hotel)
+                if len(hotels) == 3:
+                    break
         
-        print(f"✅ Found {len(hotels_response.data)} hotels:")
-        for hotel in hotels_response.data[:3]:  # Show first 3 hotels
+        print(f"✅ Showing the first {len(hotels)} hotels:")
+        for hotel in hotels:
             print(f"  🏨 {hotel.name}")
             print(f"     ID: {hotel.hotel_id}")
             print(f"     Distance: {hotel.distance.value} {hotel.distance.unit}")
@@ -46,13 +52,13 @@ async def example_hotel_search():
             print()
         
         # Get offers for the first hotel
-        if hotels_response.data:
-            first_hotel = hotels_response.data[0]
+        if hotels:
+            first_hotel = hotels[0]
             print(f"💰 Getting offers for {first_hotel.name}...")
             
             # Set dates for next week
-            check_in = date.today() + timedelta(days=7)
-            check_out = check_in + timedelta(days=2)
+            check_in = TODAY + timedelta(days=7)
+            check_out = TODAY + timedelta(days=9)
             
             offers_request = HotelOffersRequest(
                 hotel_ids=[first_hotel.hotel_id],
@@ -83,10 +89,7 @@ async def example_hotel_search():
 
 async def example_health_check():
     """Example of checking API health."""
-    client = AmadeusClient(
-        api_key="your_api_key_here",
-        api_secret="your_api_secret_here",
-    )
+    client = get_amadeus_client()
     
     print("🏥 Checking API health...")
     is_healthy = await client.health_check()
@@ -97,15 +100,23 @@ async def example_health_check():
         print("❌ API is not accessible")
 
 
+async def main():
+    """Run the examples on a single event loop sharing one client."""
+    try:
+        await example_health_check()
+        print()
+        await example_hotel_search()
+    finally:
+        await close_amadeus_client()
+
+
 if __name__ == "__main__":
     print("🚀 Amadeus Hotels API Example")
     print("=" * 50)
     
-    # Note: You need to set your actual API credentials in the client initialization
-    print("⚠️  Note: Update the API credentials in this script before running")
+    # Note: You need to set your actual API credentials in the environment
+    print("⚠️  Note: Set AMADEUS_API_KEY and AMADEUS_API_SECRET (or a .env file) before running")
     print()
     
     # Run examples
-    asyncio.run(example_health_check())
-    print()
-    asyncio.run(example_hotel_search())
+    asyncio.run(main())
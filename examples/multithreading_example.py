@@ -6,8 +6,12 @@ Example usage demonstrating multithreading capabilities of the Amadeus Hotels MC
 import asyncio
 import json
 import time
+from datetime import date, timedelta
 from typing import List, Dict, Any
 
+# Computed once; request dates below are day offsets from today
+TODAY = date.today()
+
 # Example usage of the multithreaded Amadeus Hotels API
 
 
@@ -65,24 +69,24 @@ async def example_batch_hotel_offers():
     hotel_offer_requests = [
         {
             "hotel_ids": ["RTPAR001", "RTPAR002"],
-            "check_in_date": "2024-06-01",
-            "check_out_date": "2024-06-05",
+            "check_in_date": (TODAY + timedelta(days=30)).isoformat(),
+            "check_out_date": (TODAY + timedelta(days=34)).isoformat(),
             "adults": 2,
             "room_quantity": 1,
             "currency": "USD"
         },
         {
             "hotel_ids": ["RTPAR003", "RTPAR004"],
-            "check_in_date": "2024-07-15",
-            "check_out_date": "2024-07-20",
+            "check_in_date": (TODAY + timedelta(days=60)).isoformat(),
+            "check_out_date": (TODAY + timedelta(days=65)).isoformat(),
             "adults": 2,
             "room_quantity": 1,
             "currency": "USD"
         },
         {
             "hotel_ids": ["RTPAR005"],
-            "check_in_date": "2024-08-10",
-            "check_out_date": "2024-08-15",
+            "check_in_date": (TODAY + timedelta(days=90)).isoformat(),
+            "check_out_date": (TODAY + timedelta(days=95)).isoformat(),
             "adults": 1,
             "room_quantity": 1,
             "currency": "EUR"
@@ -119,26 +123,14 @@ async def example_concurrent_workload():
     """Example demonstrating concurrent workload handling."""
     print("\n=== Concurrent Workload Demonstration ===")
     
-    # Simulate multiple concurrent requests
-    tasks = []
-    
-    # Task 1: Search multiple locations
-    task1 = example_multiple_locations_search()
-    tasks.append(task1)
-    
-    # Task 2: Batch hotel offers
-    task2 = example_batch_hotel_offers()
-    tasks.append(task2)
-    
-    # Task 3: Performance monitoring
-    task3 = example_performance_monitoring()
-    tasks.append(task3)
-    
     print("Executing multiple operations concurrently...")
     start_time = time.time()
     
-    # Execute all tasks concurrently
-    await asyncio.gather(*tasks)
+    # Execute all tasks concurrently; a failure in one cancels its siblings
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(example_multiple_locations_search())
+        tg.create_task(example_batch_hotel_offers())
+        tg.create_task(example_performance_monitoring())
     
     end_time = time.time()
     print(f"All operations completed in {end_time - start_time:.2f} seconds")
@@ -167,7 +159,7 @@ def print_multithreading_benefits():
     
     print("\nCONFIGURATION OPTIONS:")
     config_options = [
-        "CLIENT_POOL_SIZE: Number of concurrent API clients (default: 5)",
+        "CLIENT_POOL_SIZE: Keep-alive HTTP connections kept warm (default: 5)",
         "MAX_CONCURRENT_REQUESTS: Maximum concurrent requests (default: 10)",
         "ENABLE_CONNECTION_POOLING: HTTP connection pooling (default: true)",
         "ENABLE_CACHING: Response caching (default: false)",
@@ -212,7 +204,7 @@ async def main():
     
     implementation_summary = {
         "multithreading_features": [
-            "AmadeusClientPool: Thread-safe client pool for concurrent API calls",
+            "Async HTTP client: One shared connection pool for concurrent API calls",
             "Concurrent hotel search: Multiple locations searched simultaneously",
             "Batch operations: Multiple hotel offer requests processed in parallel",
             "Performance monitoring: Real-time metrics and statistics",
@@ -242,6 +234,11 @@ async def main():
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(main())
 
 
@@ -0,0 +1,55 @@
+"""
+Gunicorn configuration for multi-process streamable HTTP deployments.
+
+Usage:
+    STATELESS_HTTP=true gunicorn "src.main:build_asgi_app()"
+
+Gunicorn reads this file from the working directory. Each worker runs its own
+uvicorn event loop; the app is built once in the master and shared with the
+workers copy-on-write. MCP sessions live in worker memory, so run statelessly
+(STATELESS_HTTP=true) unless the load balancer pins sessions to a worker.
+"""
+
+import multiprocessing
+import os
+
+from uvicorn_worker import UvicornWorker
+
+from src.config import get_app_settings, setup_logging
+from src.main import raise_open_file_limit
+
+_settings = get_app_settings()
+setup_logging(_settings.log_level)
+# Inherited by the workers
+raise_open_file_limit()
+
+
+class LimitedUvicornWorker(UvicornWorker):
+    """UvicornWorker that also applies HTTP_LIMIT_CONCURRENCY.
+    
+    UvicornWorker maps gunicorn's keepalive and backlog onto uvicorn but
+    ignores worker_connections, so the concurrency limit is passed here.
+    """
+    
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        "limit_concurrency": _settings.http_limit_concurrency or None,
+    }
+
+
+bind = f"{_settings.host}:{_settings.port}"
+workers = int(os.getenv("WEB_CONCURRENCY", 2 * multiprocessing.cpu_count() + 1))
+worker_class = LimitedUvicornWorker
+preload_app = True
+timeout = 60
+# UvicornWorker passes these on as backlog and timeout_keep_alive
+backlog = _settings.http_backlog
+keepalive = _settings.http_keep_alive_timeout
+# Recycle workers now and then, staggered so they don't all restart together
+max_requests = 10000
+max_requests_jitter = 1000
+
+
+def post_fork(server, worker):
+    """Restart the log writer thread, which does not survive the fork."""
+    setup_logging(_settings.log_level)
@@ -9,18 +9,29 @@ __version__ = "0.1.0"
 __author__ = "Your Name"
 __email__ = "your.email@example.com"
 
-from .main import main, create_mcp_server
-from .amadeus_client import AmadeusClient, AmadeusAPIError, AmadeusAuthenticationError, AmadeusRateLimitError
-from .models import (
-    HotelsListRequest,
-    HotelsListResponse,
-    HotelOffersRequest,
-    HotelOffersResponse,
-    Hotel,
-    HotelOffer,
-)
-from .config import Settings, get_app_settings, setup_logging
-from .tools import AmadeusHotelsTools
+import importlib
+from typing import Any
+
+# Submodules are imported on first attribute access (PEP 562) so that
+# importing the package does not pull in pydantic, httpx and the MCP SDK.
+_LAZY_IMPORTS = {
+    "main": ".main",
+    "create_mcp_server": ".main",
+    "AmadeusClient": ".amadeus_client",
+    "AmadeusAPIError": ".amadeus_client",
+    "AmadeusAuthenticationError": ".amadeus_client",
+    "AmadeusRateLimitError": ".amadeus_client",
+    "HotelsListRequest": ".models",
+    "HotelsListResponse": ".models",
+    "HotelOffersRequest": ".models",
+    "HotelOffersResponse": ".models",
+    "Hotel": ".models",
+    "HotelOffer": ".models",
+    "Settings": ".config",
+    "get_app_settings": ".config",
+    "setup_logging": ".config",
+    "AmadeusHotelsTools": ".tools",
+}
 
 __all__ = [
     "main",
@@ -40,3 +51,16 @@ __all__ = [
     "setup_logging",
     "AmadeusHotelsTools",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Import public symbols from their submodules on first access."""
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
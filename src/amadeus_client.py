@@ -1,42 +1,76 @@
 """
-Amadeus API client for hotels services using the official SDK.
+Async Amadeus API client for hotels services.
 """
 
 import asyncio
+import contextlib
+import hashlib
 import logging
-from typing import Dict, List, Optional, Any
-from datetime import date
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
-from contextlib import asynccontextmanager
-
-from amadeus import Client, Response
-from amadeus.client.errors import ResponseError, ClientError, ServerError, NetworkError, AuthenticationError
-
-try:
-    from .models import (
-        HotelsListRequest,
-        HotelsListResponse,
-        HotelOffersRequest,
-        HotelOffersResponse,
-        HotelBookingRequest,
-        HotelBookingResponse,
-        AmadeusErrorResponse,
-    )
-except ImportError:
-    # Handle direct execution
-    from models import (
-        HotelsListRequest,
-        HotelsListResponse,
-        HotelOffersRequest,
-        HotelOffersResponse,
-        HotelBookingRequest,
-        HotelBookingResponse,
-        AmadeusErrorResponse,
-    )
+import random
+import time
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any, Tuple, Union
+
+import httpx
+import ijson
+import orjson
+
+from .models import (
+    HotelsListRequest,
+    Hotel,
+    HotelsListResponse,
+    HotelOffersRequest,
+    HotelOffersResponse,
+    HotelBookingRequest,
+    HotelBookingResponse,
+    AmadeusErrorResponse,
+)
+from .config import get_app_settings
+from .scheduler import AsyncTokenBucket, MicroBatcher, PrioritySemaphore, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+from .cache import AmadeusCache
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on hotel IDs sent in one coalesced hotel-offers call
+MAX_HOTEL_IDS_PER_OFFERS_REQUEST = 20
+
+# API paths, relative to the client's base URL
+_TOKEN_PATH = "/v1/security/oauth2/token"
+_HOTELS_BY_GEOCODE = "/v1/reference-data/locations/hotels/by-geocode"
+_HOTEL_OFFERS = "/v3/shopping/hotel-offers"
+_HOTEL_ORDERS = "/v2/booking/hotel-orders"
+
+_FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+# Background token refresh: how long before expiry to renew, the shortest
+# wait between renewals and the wait before retrying a failed renewal
+_TOKEN_REFRESH_MARGIN = 60.0
+_TOKEN_REFRESH_MIN_INTERVAL = 5.0
+_TOKEN_REFRESH_RETRY_DELAY = 30.0
+
+# Small fixed search (central Madrid) used as the health check probe
+_HEALTH_CHECK_PARAMS = {"latitude": 40.41436995, "longitude": -3.69170868, "radius": 1}
+
+
+def _offers_group_key(params: Dict[str, Any]) -> tuple:
+    """Key shared by offer searches that differ only in their hotel IDs."""
+    return tuple(sorted((k, v) for k, v in params.items() if k != "hotelIds"))
+
+
+def _log_batch_failures(operation: str, total: int, failures: List[Exception]) -> None:
+    """Log one summary line for the failed calls of a batch instead of one per call."""
+    if failures:
+        logger.error(
+            "%s: %d of %d calls failed %s; first error: %s",
+            operation,
+            len(failures),
+            total,
+            dict(Counter(type(e).__name__ for e in failures)),
+            failures[0],
+        )
+
 
 class AmadeusAPIError(Exception):
     """Base exception for Amadeus API errors."""
@@ -54,89 +88,93 @@ class AmadeusAuthenticationError(AmadeusAPIError):
 
 class AmadeusRateLimitError(AmadeusAPIError):
     """Rate limit exceeded error."""
-    pass
-
-
-class AmadeusClientPool:
-    """Thread-safe pool of Amadeus API clients for concurrent operations."""
     
     def __init__(
         self,
-        api_key: str,
-        api_secret: str,
-        base_url: str = "https://test.api.amadeus.com",
-        timeout: float = 30.0,
-        max_retries: int = 3,
-        pool_size: int = 5,
+        message: str,
+        status_code: Optional[int] = None,
+        error_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
     ):
-        self.api_key = api_key
-        self.api_secret = api_secret
-        self.base_url = base_url.rstrip('/')
-        self.timeout = timeout
-        self.max_retries = max_retries
-        self.pool_size = pool_size
+        super().__init__(message, status_code, error_code)
+        self.retry_after = retry_after
+
+
+class AmadeusTokenCache:
+    """Expiry-aware OAuth2 access token shared by every request that uses it.
+    
+    Pass the same instance to several AmadeusClient objects with the same
+    credentials and they will all reuse one token, with at most one refresh
+    in flight regardless of concurrency.
+    """
+    
+    def __init__(self):
+        self.access_token: Optional[str] = None
+        self.expires_at: float = 0.0
+        self._lock = asyncio.Lock()
+    
+    def is_valid(self) -> bool:
+        """Check whether the cached token can still be used."""
+        return self.access_token is not None and time.monotonic() < self.expires_at
+    
+    async def get(self, fetch: Callable[[], Awaitable[Tuple[str, float]]]) -> str:
+        """Return the cached token, calling ``fetch`` once to refresh it when stale.
         
-        # Determine hostname based on base_url
-        if 'test.api.amadeus.com' in base_url:
-            hostname = 'test'
-        elif 'api.amadeus.com' in base_url:
-            hostname = 'production'
-        else:
-            hostname = 'test'  # Default to test environment
-        
-        # Create thread pool for concurrent operations
-        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="amadeus-client")
-        
-        # Create client pool
-        self._clients = []
-        self._client_lock = threading.Lock()
-        
-        # Initialize clients
-        for i in range(pool_size):
-            client = Client(
-                client_id=api_key,
-                client_secret=api_secret,
-                hostname=hostname,
-                log_level='silent'
-            )
-            self._clients.append(client)
-    
-    def get_client(self) -> Client:
-        """Get an available client from the pool."""
-        with self._client_lock:
-            if self._clients:
-                return self._clients.pop()
-            else:
-                # Create a new client if pool is empty
-                return Client(
-                    client_id=self.api_key,
-                    client_secret=self.api_secret,
-                    hostname='test' if 'test.api.amadeus.com' in self.base_url else 'production',
-                    log_level='silent'
-                )
+        ``fetch`` returns the new token and its lifetime in seconds.
+        """
+        if self.is_valid():
+            return self.access_token
+        
+        async with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self.is_valid():
+                return self.access_token
+            
+            return await self._store(fetch)
     
-    def return_client(self, client: Client) -> None:
-        """Return a client to the pool."""
-        with self._client_lock:
-            if len(self._clients) < self.pool_size:
-                self._clients.append(client)
+    async def refresh(self, fetch: Callable[[], Awaitable[Tuple[str, float]]]) -> str:
+        """Replace the cached token now, even if it is still valid."""
+        async with self._lock:
+            return await self._store(fetch)
     
-    @asynccontextmanager
-    async def get_client_context(self):
-        """Context manager for getting and returning a client."""
-        client = self.get_client()
-        try:
-            yield client
-        finally:
-            self.return_client(client)
+    async def _store(self, fetch: Callable[[], Awaitable[Tuple[str, float]]]) -> str:
+        access_token, expires_in = await fetch()
+        # Refresh at 90% of the token lifetime so in-flight requests never carry a stale token
+        self.access_token = access_token
+        self.expires_at = time.monotonic() + expires_in * 0.9
+        return access_token
+    
+    def invalidate(self, token: Optional[str] = None) -> None:
+        """Drop the cached token so the next request re-authenticates.
+        
+        When ``token`` is given, only drop it if it is still the cached one,
+        so a burst of rejected requests causes a single refresh.
+        """
+        if token is not None and token != self.access_token:
+            return
+        self.access_token = None
+        self.expires_at = 0.0
+
+
+class _ResponseReader:
+    """Expose an httpx response body as the async file object ijson reads from."""
     
-    def shutdown(self):
-        """Shutdown the client pool and executor."""
-        self.executor.shutdown(wait=True)
+    def __init__(self, response: httpx.Response):
+        self._chunks = response.aiter_bytes()
+    
+    async def read(self, size: int = -1) -> bytes:
+        # ijson probes with read(0); don't consume a chunk for it
+        if size == 0:
+            return b""
+        return await anext(self._chunks, b"")
 
 
 class AmadeusClient:
-    """Client for Amadeus Hotels API using the official SDK with multithreading support."""
+    """Async client for the Amadeus Hotels API.
+    
+    All calls share one httpx connection pool, so keep-alive TLS connections
+    are reused and concurrent requests never block the event loop.
+    """
     
     def __init__(
         self,
@@ -146,262 +184,677 @@ class AmadeusClient:
         timeout: float = 30.0,
         max_retries: int = 3,
         pool_size: int = 5,
+        burst_limit: int = 15,
+        http2: bool = True,
+        max_concurrent_requests: int = 10,
+        priority_aging_seconds: float = 0.5,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 30.0,
+        retry_jitter: float = 0.5,
+        token_cache: Optional[AmadeusTokenCache] = None,
+        geo_cache_ttl: int = 600,
+        geo_cache_max_size: int = 4096,
+        health_check_ttl: float = 30.0,
+        rate_limit_per_second: float = 0.0,
+        offers_batch_window: float = 0.0,
     ):
         self.api_key = api_key
         self.api_secret = api_secret
+        # OAuth2 client-credentials form, encoded once
+        self._token_body = urlencode({
+            "grant_type": "client_credentials",
+            "client_id": api_key,
+            "client_secret": api_secret,
+        }).encode()
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
         self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.burst_limit = burst_limit
+        self.http2 = http2
+        self.max_concurrent_requests = max_concurrent_requests
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.retry_jitter = retry_jitter
         
-        # Initialize client pool for concurrent operations
-        self.client_pool = AmadeusClientPool(
-            api_key=api_key,
-            api_secret=api_secret,
-            base_url=base_url,
-            timeout=timeout,
-            max_retries=max_retries,
-            pool_size=pool_size
+        # Shared rate-limit backpressure: a 429 on any request pauses every
+        # caller until this monotonic deadline
+        self._backoff_until: float = 0.0
+        
+        # Client-side request pacing that halves on 429 and ramps back up
+        # while requests succeed; a rate of 0 disables it
+        self._rate_limiter: Optional[AsyncTokenBucket] = (
+            AsyncTokenBucket(rate_limit_per_second) if rate_limit_per_second > 0 else None
         )
         
-        # Keep a single client for backward compatibility
-        self.client = self.client_pool.get_client()
-    
-    def _handle_sdk_error(self, error: Exception) -> None:
-        """Convert SDK errors to our custom exceptions."""
-        if isinstance(error, AuthenticationError):
-            raise AmadeusAuthenticationError("Invalid API credentials")
-        elif isinstance(error, ResponseError):
-            # Try to extract error details from the response
-            if hasattr(error, 'response') and error.response:
-                try:
-                    error_data = error.response.body
-                    if isinstance(error_data, dict) and 'errors' in error_data:
-                        error_list = error_data['errors']
-                        if error_list:
-                            first_error = error_list[0]
-                            status_code = first_error.get('status', error.response.status_code)
-                            error_code = first_error.get('code')
-                            title = first_error.get('title', 'Unknown error')
-                            detail = first_error.get('detail', 'No details available')
-                            
-                            if status_code == 429:
-                                raise AmadeusRateLimitError(f"Rate limit exceeded: {title} - {detail}")
-                            else:
-                                raise AmadeusAPIError(f"Amadeus API error: {title} - {detail}", status_code, error_code)
-                except (KeyError, TypeError, AttributeError):
-                    pass
-            
-            # Fallback error handling
-            if error.response and error.response.status_code == 429:
-                raise AmadeusRateLimitError("Rate limit exceeded")
-            elif error.response and error.response.status_code == 401:
-                raise AmadeusAuthenticationError("Authentication failed")
-            else:
-                status_code = error.response.status_code if error.response else None
-                raise AmadeusAPIError(f"API error: {str(error)}", status_code)
-        elif isinstance(error, (NetworkError, ClientError)):
+        # Request slots shared by all callers; interactive searches are
+        # admitted ahead of queued batch sub-requests
+        self._request_slots = PrioritySemaphore(
+            max_concurrent_requests, aging_seconds=priority_aging_seconds
+        )
+        
+        # Shared async HTTP session; with HTTP/2 concurrent requests are
+        # multiplexed over a single TLS connection to the Amadeus API.
+        # pool_size connections are kept warm; up to burst_limit extra
+        # connections may be opened under load and are dropped once idle.
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=http2,
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(
+                max_connections=pool_size + burst_limit,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=300,
+            ),
+            headers={"Accept": "application/json, application/vnd.amadeus+json"},
+        )
+        
+        # OAuth2 access token, optionally shared with other clients, and the
+        # Authorization header built from it (rebuilt only when it rotates)
+        self._token_cache = token_cache or AmadeusTokenCache()
+        self._auth_token: Optional[str] = None
+        self._auth_headers: Dict[str, str] = {}
+        self._token_refresher: Optional[asyncio.Task] = None
+        
+        # Hotel list results for a location barely change over minutes, so
+        # cache them (with single-flight fills); a TTL of 0 disables this
+        self._geo_cache: Optional[AmadeusCache] = (
+            AmadeusCache(max_size=geo_cache_max_size, default_ttl=geo_cache_ttl)
+            if geo_cache_ttl > 0
+            else None
+        )
+        self.health_check_ttl = health_check_ttl
+        self._last_healthy_at: Optional[float] = None
+        
+        # Offer searches arriving within a short window that differ only in
+        # hotel IDs share one upstream call; a window of 0 disables this
+        self._offers_batcher: Optional[MicroBatcher] = (
+            MicroBatcher(
+                self._search_hotel_offers_together,
+                window=offers_batch_window,
+                max_items=MAX_HOTEL_IDS_PER_OFFERS_REQUEST,
+                key=lambda request: _offers_group_key(request.as_params),
+            )
+            if offers_batch_window > 0
+            else None
+        )
+    
+    def _handle_error(self, error: Exception) -> None:
+        """Convert transport and unexpected errors to our custom exceptions."""
+        if isinstance(error, AmadeusAPIError):
+            raise error
+        elif isinstance(error, httpx.HTTPError):
             raise AmadeusAPIError(f"Network error: {str(error)}")
         else:
             raise AmadeusAPIError(f"Unexpected error: {str(error)}")
     
-    async def search_hotels_by_location(self, request: HotelsListRequest) -> HotelsListResponse:
-        """Search for hotels by location using the SDK."""
+    @staticmethod
+    def _parse_retry_after(response: httpx.Response) -> Optional[float]:
+        """Read the Retry-After header as a number of seconds, if present.
+        
+        Accepts fractional seconds as well as the HTTP-date form.
+        """
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
         try:
-            # Prepare parameters for the SDK call
-            params = {
-                "latitude": request.latitude,
-                "longitude": request.longitude,
-                "radius": request.radius,
-                "radiusUnit": request.radius_unit,
-            }
-            
-            # Add optional parameters
-            if request.chain_codes:
-                params["chainCodes"] = ",".join(request.chain_codes)
-            if request.amenities:
-                params["amenities"] = ",".join(request.amenities)
-            if request.ratings:
-                params["ratings"] = ",".join(request.ratings)
-            if request.hotel_source:
-                params["hotelSource"] = request.hotel_source
-            
-            # Make the API call using the SDK
-            response = self.client.reference_data.locations.hotels.by_geocode.get(**params)
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+    
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Exponential backoff with jitter, never shorter than the server's Retry-After.
+        
+        The capped exponential delay is scaled down by a random fraction of up
+        to ``retry_jitter``, so callers that failed together retry apart.
+        """
+        delay = min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt))
+        delay *= 1 - self.retry_jitter * random.random()
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+    
+    def _extend_backoff(self, delay: float) -> None:
+        """Pause all callers for at least ``delay`` seconds."""
+        self._backoff_until = max(self._backoff_until, time.monotonic() + delay)
+    
+    async def _pace(self) -> None:
+        """Wait for a token from the client-side rate limiter, if enabled."""
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire()
+    
+    def _record_rate_limit_outcome(self, status_code: int) -> None:
+        """Feed a response status back into the adaptive rate limiter."""
+        if self._rate_limiter is None:
+            return
+        if status_code == 429:
+            self._rate_limiter.on_rate_limited()
+        elif status_code < 400:
+            self._rate_limiter.on_success()
+    
+    async def _wait_for_backoff(self) -> None:
+        """Wait out any shared rate-limit backoff before sending a request."""
+        wait = self._backoff_until - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+    
+    def _raise_for_response(self, response: httpx.Response) -> None:
+        """Convert an Amadeus error response to our custom exceptions."""
+        status_code = response.status_code
+        try:
+            error_list = orjson.loads(response.content).get('errors') or []
+        except (orjson.JSONDecodeError, AttributeError):
+            error_list = []
+        
+        if error_list:
+            first_error = error_list[0]
+            error_code = first_error.get('code')
+            title = first_error.get('title', 'Unknown error')
+            detail = first_error.get('detail', 'No details available')
+            if status_code == 429:
+                raise AmadeusRateLimitError(
+                    f"Rate limit exceeded: {title} - {detail}",
+                    status_code,
+                    error_code,
+                    retry_after=self._parse_retry_after(response),
+                )
+            elif status_code == 401:
+                raise AmadeusAuthenticationError(f"Authentication failed: {title} - {detail}", status_code, error_code)
+            raise AmadeusAPIError(f"Amadeus API error: {title} - {detail}", status_code, error_code)
+        
+        if status_code == 429:
+            raise AmadeusRateLimitError(
+                "Rate limit exceeded", status_code, retry_after=self._parse_retry_after(response)
+            )
+        elif status_code == 401:
+            raise AmadeusAuthenticationError("Authentication failed", status_code)
+        raise AmadeusAPIError(f"API error: HTTP {status_code}", status_code)
+    
+    async def _fetch_access_token(self) -> Tuple[str, float]:
+        """Request a new OAuth2 access token; returns the token and its lifetime."""
+        response = await self._http.post(_TOKEN_PATH, content=self._token_body, headers=_FORM_HEADERS)
+        if response.status_code != 200:
+            raise AmadeusAuthenticationError("Invalid API credentials", response.status_code)
+        
+        try:
+            token_data = orjson.loads(response.content)
+            access_token = token_data["access_token"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise AmadeusAuthenticationError(f"Malformed token response: {e!r}", response.status_code) from e
+        expires_in = token_data.get("expires_in", 1799)
+        logger.debug("Obtained new access token (expires in %ss) over %s", expires_in, response.http_version)
+        if self.http2 and response.http_version != "HTTP/2":
+            logger.debug("HTTP/2 was not negotiated with the Amadeus API; requests will not be multiplexed")
+        return access_token, expires_in
+    
+    async def _get_access_token(self) -> str:
+        """Get an OAuth2 access token from the shared cache, refreshing it when expired."""
+        return await self._token_cache.get(self._fetch_access_token)
+    
+    async def warm_up(self) -> None:
+        """Fetch an access token ahead of the first request, opening a pooled connection.
+        
+        Rejected credentials are raised so a misconfigured server fails at
+        startup; other failures are logged and left to the first request.
+        """
+        try:
+            await self._get_access_token()
+        except AmadeusAuthenticationError as e:
+            if e.status_code in (400, 401):
+                raise
+            logger.warning("Could not warm up the Amadeus API connection: %s", e)
+        except httpx.HTTPError as e:
+            logger.warning("Could not warm up the Amadeus API connection: %s", e)
+    
+    def start_token_refresh(self) -> None:
+        """Renew the access token in the background shortly before it expires.
+        
+        Requests then always find a valid token in the cache. If a renewal
+        fails, the current token stays in use and the request path falls
+        back to fetching one on demand once it expires.
+        """
+        if self._token_refresher is None or self._token_refresher.done():
+            self._token_refresher = asyncio.create_task(self._refresh_token_periodically())
+    
+    async def _refresh_token_periodically(self) -> None:
+        while True:
+            if self._token_cache.is_valid():
+                # Re-check after sleeping: another client sharing the cache may have renewed it
+                delay = self._token_cache.expires_at - time.monotonic() - _TOKEN_REFRESH_MARGIN
+                await asyncio.sleep(max(delay, _TOKEN_REFRESH_MIN_INTERVAL))
+                if self._token_cache.expires_at - time.monotonic() > _TOKEN_REFRESH_MARGIN:
+                    continue
+            try:
+                await self._token_cache.refresh(self._fetch_access_token)
+            except Exception:
+                # Includes malformed token responses; the task must outlive them
+                logger.exception("Background access token refresh failed")
+                await asyncio.sleep(_TOKEN_REFRESH_RETRY_DELAY)
+    
+    def _auth_headers_for(self, token: str) -> Dict[str, str]:
+        """Return the Authorization header for ``token``, reusing it until the token rotates."""
+        if token is not self._auth_token:
+            self._auth_headers = {"Authorization": f"Bearer {token}"}
+            self._auth_token = token
+        return self._auth_headers
+    
+    def invalidate_token(self) -> None:
+        """Drop the cached access token so the next request re-authenticates."""
+        self._token_cache.invalidate()
+        logger.info("Access token invalidated")
+    
+    def _is_retryable(self, error: Exception, idempotent: bool) -> bool:
+        """Return True if a failed call may succeed when repeated.
+        
+        Rate limits are always retried. Server errors (5xx) and transport
+        failures are only retried for idempotent calls, so a booking is never
+        submitted twice. Authentication and other client errors are final.
+        """
+        if isinstance(error, AmadeusRateLimitError):
+            return True
+        if not idempotent:
+            return False
+        if isinstance(error, AmadeusAPIError):
+            return error.status_code is not None and error.status_code >= 500
+        return isinstance(error, httpx.TransportError)
+    
+    async def _with_retry(
+        self,
+        coro_factory: Callable[[], Awaitable[Any]],
+        description: str,
+        idempotent: bool = True,
+    ) -> Any:
+        """Run ``coro_factory()`` with exponential backoff and jitter on transient failures.
+        
+        Makes up to ``max_retries`` extra attempts. A 429 also extends the
+        shared backoff, so concurrent callers hold off instead of adding to
+        the storm; other transient failures only delay this caller.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await coro_factory()
+            except (AmadeusAPIError, httpx.HTTPError) as e:
+                if attempt >= self.max_retries or not self._is_retryable(e, idempotent):
+                    raise
+                if isinstance(e, AmadeusRateLimitError):
+                    delay = self._backoff_delay(attempt, e.retry_after)
+                    self._extend_backoff(delay)
+                    logger.warning("Rate limited on %s, backing off %.2fs (attempt %d)", description, delay, attempt + 1)
+                else:
+                    delay = self._backoff_delay(attempt)
+                    logger.warning(
+                        "Transient error on %s: %s; retrying in %.2fs (attempt %d)", description, e, delay, attempt + 1
+                    )
+                    await asyncio.sleep(delay)
+    
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Send a single authenticated request and decode the response.
+        
+        A 401 means the cached token was revoked or expired early; it is
+        evicted and the request is sent once more with a fresh token.
+        """
+        async def send() -> Tuple[str, httpx.Response]:
+            token = await self._get_access_token()
+            response = await self._http.request(
+                method,
+                endpoint,
+                params=params,
+                json=json,
+                headers=self._auth_headers_for(token),
+            )
+            return token, response
+        
+        await self._wait_for_backoff()
+        await self._pace()
+        token, response = await send()
+        if response.status_code == 401:
+            logger.warning("Access token rejected on %s, re-authenticating", endpoint)
+            self._token_cache.invalidate(token)
+            token, response = await send()
+        self._record_rate_limit_outcome(response.status_code)
+        if response.status_code >= 400:
+            self._raise_for_response(response)
+        return orjson.loads(response.content)
+    
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Make an authenticated request to the Amadeus API, retrying transient failures."""
+        return await self._with_retry(
+            lambda: self._send(method, endpoint, params=params, json=json),
+            endpoint,
+            idempotent=method in ("GET", "HEAD"),
+        )
+    
+    async def _cached_hotel_search(self, fetch, request: HotelsListRequest) -> HotelsListResponse:
+        """Serve a hotel list search from the geo cache, calling ``fetch`` on a miss."""
+        if self._geo_cache is None:
+            return await fetch(request)
+        return await self._geo_cache.get_or_set("search_hotels_by_location", fetch, request)
+    
+    @property
+    def geo_cache_enabled(self) -> bool:
+        """Whether hotel list results are cached by the client itself."""
+        return self._geo_cache is not None
+    
+    def geo_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Statistics of the hotel list cache, or None when it is disabled."""
+        if self._geo_cache is None:
+            return None
+        return self._geo_cache.stats()
+    
+    def clear_geo_cache(self) -> int:
+        """Drop all cached hotel list results; returns the number of entries removed."""
+        if self._geo_cache is None:
+            return 0
+        removed = self._geo_cache.cache.size()
+        self._geo_cache.clear()
+        logger.info("Cleared %d cached hotel list results", removed)
+        return removed
+    
+    async def search_hotels_by_location(self, request: HotelsListRequest) -> HotelsListResponse:
+        """Search for hotels by location over the shared HTTP session."""
+        async def fetch(request: HotelsListRequest) -> HotelsListResponse:
+            # Make the API call over the shared HTTP session
+            async with self._request_slots.slot(PRIORITY_INTERACTIVE):
+                response = await self._make_request("GET", _HOTELS_BY_GEOCODE, request.as_params)
             
-            # Convert SDK response to our model
-            # The SDK returns the data directly, so we need to wrap it in the expected format
-            # Handle case where response.data might be None
+            # Convert API response to our model
+            # Handle case where data or meta might be missing
             response_data = {
-                "data": response.data if response.data is not None else [],
-                "meta": {}  # SDK doesn't return meta, so we provide empty dict
+                "data": response.get("data") or [],
+                "meta": response.get("meta") or {},
             }
-            return HotelsListResponse(**response_data)
-            
+            return HotelsListResponse.model_validate(response_data)
+        
+        try:
+            return await self._cached_hotel_search(fetch, request)
+        except Exception as e:
+            logger.error("Error searching hotels by location: %s", e)
+            self._handle_error(e)
+    
+    async def search_hotels_by_location_stream(self, request: HotelsListRequest) -> AsyncIterator[Hotel]:
+        """Search for hotels by location, yielding each hotel as it is parsed.
+        
+        The response body is parsed incrementally, so callers that only need
+        the first few hotels can stop early without decoding the rest. Close
+        the iterator (e.g. with contextlib.aclosing) when breaking out early.
+        
+        A request slot is held only until the response headers arrive; the
+        body is read as the caller consumes it, so a slow consumer keeps the
+        HTTP stream open but never blocks other API calls.
+        """
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                async with self._request_slots.slot(PRIORITY_INTERACTIVE):
+                    await self._wait_for_backoff()
+                    await self._pace()
+                    token = await self._get_access_token()
+                    response = await stack.enter_async_context(self._http.stream(
+                        "GET",
+                        _HOTELS_BY_GEOCODE,
+                        params=request.as_params,
+                        headers=self._auth_headers_for(token),
+                    ))
+                
+                self._record_rate_limit_outcome(response.status_code)
+                if response.status_code == 401:
+                    self._token_cache.invalidate(token)
+                if response.status_code >= 400:
+                    await response.aread()
+                    try:
+                        self._raise_for_response(response)
+                    except AmadeusRateLimitError as e:
+                        # Hold off every caller, as _with_retry does
+                        self._extend_backoff(self._backoff_delay(0, e.retry_after))
+                        raise
+                
+                async for item in ijson.items_async(
+                    _ResponseReader(response), "data.item", use_float=True
+                ):
+                    yield Hotel.model_validate(item)
         except Exception as e:
-            logger.error(f"Error searching hotels by location: {e}")
-            self._handle_sdk_error(e)
+            logger.error("Error streaming hotels by location: %s", e)
+            self._handle_error(e)
     
     async def search_hotel_offers(self, request: HotelOffersRequest) -> HotelOffersResponse:
-        """Search for hotel offers using the SDK."""
+        """Search for hotel offers over the shared HTTP session.
+        
+        With an ``offers_batch_window``, concurrent searches for the same
+        dates and guests are coalesced into one upstream call.
+        """
         try:
-            # Prepare parameters for the SDK call
-            params = {
-                "hotelIds": ",".join(request.hotel_ids),
-                "adults": request.adults,
-                "checkInDate": request.check_in_date.strftime("%Y-%m-%d"),
-                "checkOutDate": request.check_out_date.strftime("%Y-%m-%d"),
-                "roomQuantity": request.room_quantity,
-                "paymentPolicy": request.payment_policy,
-                "bestRateOnly": request.best_rate_only,
-                "includeClosed": request.include_closed,
-            }
-            
-            # Add optional parameters
-            if request.currency:
-                params["currency"] = request.currency
-            if request.price_range:
-                params["priceRange"] = request.price_range
-            if request.board_type:
-                params["boardType"] = request.board_type
-            if request.lang:
-                params["lang"] = request.lang
-            
-            # Make the API call using the SDK
-            response = self.client.shopping.hotel_offers_search.get(**params)
-            
-            # Convert SDK response to our model
-            # The SDK returns the data directly, so we need to wrap it in the expected format
-            # Handle case where response.data might be None
-            response_data = {
-                "data": response.data if response.data is not None else []
-            }
-            return HotelOffersResponse(**response_data)
-            
+            if self._offers_batcher is not None:
+                return await self._offers_batcher.submit(request)
+            return await self._fetch_hotel_offers(request)
         except Exception as e:
-            logger.error(f"Error searching hotel offers: {e}")
-            self._handle_sdk_error(e)
+            logger.error("Error searching hotel offers: %s", e)
+            self._handle_error(e)
+    
+    async def _fetch_hotel_offers(self, request: HotelOffersRequest) -> HotelOffersResponse:
+        """Make a single hotel offers call at interactive priority."""
+        # Make the API call over the shared HTTP session
+        async with self._request_slots.slot(PRIORITY_INTERACTIVE):
+            response = await self._make_request("GET", _HOTEL_OFFERS, request.as_params)
+        
+        # Convert API response to our model
+        # Handle case where data might be missing
+        response_data = {
+            "data": response.get("data") or []
+        }
+        return HotelOffersResponse.model_validate(response_data)
+    
+    async def _search_hotel_offers_together(
+        self, requests: List[HotelOffersRequest]
+    ) -> List[Union[HotelOffersResponse, Exception]]:
+        """Flush a group of batched offer searches."""
+        if len(requests) == 1:
+            try:
+                return [await self._fetch_hotel_offers(requests[0])]
+            except Exception as e:
+                return [e]
+        return await self._search_hotel_offers_coalesced(requests, PRIORITY_INTERACTIVE)
     
     async def health_check(self) -> bool:
-        """Check if the API is accessible using the SDK."""
+        """Check if the API is accessible over the shared HTTP session.
+        
+        A successful check is remembered for ``health_check_ttl`` seconds so
+        frequent probes don't each cost an API call.
+        """
+        if (
+            self._last_healthy_at is not None
+            and time.monotonic() - self._last_healthy_at < self.health_check_ttl
+        ):
+            return True
+        
         try:
             # Try to make a simple API call to test connectivity
             # We'll use the hotels by geocode endpoint with a simple test
-            test_response = self.client.reference_data.locations.hotels.by_geocode.get(
-                latitude=40.41436995,
-                longitude=-3.69170868,
-                radius=1
-            )
+            async with self._request_slots.slot(PRIORITY_INTERACTIVE):
+                await self._make_request("GET", _HOTELS_BY_GEOCODE, _HEALTH_CHECK_PARAMS)
+            self._last_healthy_at = time.monotonic()
             return True
         except Exception as e:
-            logger.error(f"Health check failed: {e}")
+            logger.error("Health check failed: %s", e)
+            self._last_healthy_at = None
             return False
     
+    async def _gather_bounded(self, coros: List[Any], priority: int = PRIORITY_BATCH) -> List[Any]:
+        """Run coroutines concurrently at ``priority``, sharing the client's request slots.
+        
+        At most ``max_concurrent_requests`` calls are in flight; the rest wait
+        for a slot. Results come back in order, with a failed call's exception
+        in place of its result. If the caller is cancelled, every pending call
+        is cancelled with it.
+        """
+        async def run_one(coro):
+            try:
+                async with self._request_slots.slot(priority):
+                    return await coro
+            except Exception as e:
+                return e
+            finally:
+                # No-op once awaited; avoids "never awaited" warnings on cancellation
+                coro.close()
+        
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(run_one(coro)) for coro in coros]
+        return [task.result() for task in tasks]
+    
     async def search_hotels_by_locations_concurrent(self, requests: List[HotelsListRequest]) -> List[HotelsListResponse]:
         """Search for hotels by multiple locations concurrently."""
-        async def search_single_location(request: HotelsListRequest) -> HotelsListResponse:
+        async def fetch_single_location(request: HotelsListRequest) -> HotelsListResponse:
             """Search hotels for a single location."""
-            async with self.client_pool.get_client_context() as client:
-                # Prepare parameters for the SDK call
-                params = {
-                    "latitude": request.latitude,
-                    "longitude": request.longitude,
-                    "radius": request.radius,
-                    "radiusUnit": request.radius_unit,
-                }
-                
-                # Add optional parameters
-                if request.chain_codes:
-                    params["chainCodes"] = ",".join(request.chain_codes)
-                if request.amenities:
-                    params["amenities"] = ",".join(request.amenities)
-                if request.ratings:
-                    params["ratings"] = ",".join(request.ratings)
-                if request.hotel_source:
-                    params["hotelSource"] = request.hotel_source
-                
-                # Make the API call using the SDK
-                response = client.reference_data.locations.hotels.by_geocode.get(**params)
-                
-                # Convert SDK response to our model
-                # Handle case where response.data might be None
-                response_data = {
-                    "data": response.data if response.data is not None else [],
-                    "meta": {}  # SDK doesn't return meta, so we provide empty dict
-                }
-                return HotelsListResponse(**response_data)
-        
-        # Execute all searches concurrently
-        tasks = [search_single_location(req) for req in requests]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Handle exceptions and return successful results
-        responses = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Error searching location {i}: {result}")
-                # Return empty response for failed requests
-                responses.append(HotelsListResponse(data=[], meta={}))
-            else:
-                responses.append(result)
+            async with self._request_slots.slot(PRIORITY_BATCH):
+                response = await self._make_request("GET", _HOTELS_BY_GEOCODE, request.as_params)
+            return HotelsListResponse.model_validate({
+                "data": response.get("data") or [],
+                "meta": response.get("meta") or {},
+            })
         
-        return responses
+        # Execute all searches concurrently. Only the upstream call takes a
+        # request slot: a search waiting on an identical one already in flight
+        # must not hold a slot that the in-flight search needs to finish.
+        results = await asyncio.gather(
+            *(self._cached_hotel_search(fetch_single_location, req) for req in requests),
+            return_exceptions=True,
+        )
+        
+        # Return an empty response for each failed request
+        failures = [result for result in results if isinstance(result, Exception)]
+        _log_batch_failures("Location search", len(results), failures)
+        if not failures:
+            return results
+        return [
+            HotelsListResponse(data=[], meta={}) if isinstance(result, Exception) else result
+            for result in results
+        ]
     
     async def search_hotel_offers_batch(self, requests: List[HotelOffersRequest]) -> List[HotelOffersResponse]:
-        """Search for hotel offers for multiple requests concurrently."""
-        async def search_single_offer(request: HotelOffersRequest) -> HotelOffersResponse:
-            """Search hotel offers for a single request."""
-            async with self.client_pool.get_client_context() as client:
-                # Prepare parameters for the SDK call
-                params = {
-                    "hotelIds": ",".join(request.hotel_ids),
-                    "adults": request.adults,
-                    "checkInDate": request.check_in_date.strftime("%Y-%m-%d"),
-                    "checkOutDate": request.check_out_date.strftime("%Y-%m-%d"),
-                    "roomQuantity": request.room_quantity,
-                    "paymentPolicy": request.payment_policy,
-                    "bestRateOnly": request.best_rate_only,
-                    "includeClosed": request.include_closed,
-                }
-                
-                # Add optional parameters
-                if request.currency:
-                    params["currency"] = request.currency
-                if request.price_range:
-                    params["priceRange"] = request.price_range
-                if request.board_type:
-                    params["boardType"] = request.board_type
-                if request.lang:
-                    params["lang"] = request.lang
-                
-                # Make the API call using the SDK
-                response = client.shopping.hotel_offers_search.get(**params)
-                
-                # Convert SDK response to our model
-                # Handle case where response.data might be None
-                response_data = {
-                    "data": response.data if response.data is not None else []
-                }
-                return HotelOffersResponse(**response_data)
-        
-        # Execute all searches concurrently
-        tasks = [search_single_offer(req) for req in requests]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Handle exceptions and return successful results
-        responses = []
-        for i, result in enumerate(results):
+        """Search for hotel offers for multiple requests concurrently.
+        
+        Requests that differ only in their hotel IDs are coalesced into one
+        upstream call (split into chunks of MAX_HOTEL_IDS_PER_OFFERS_REQUEST)
+        and the results are scattered back per request. If a coalesced call
+        fails, the requests it covered are retried individually so one bad
+        hotel ID cannot empty the whole group.
+        """
+        results = await self._search_hotel_offers_coalesced(requests)
+        # Return an empty response for each failed request
+        return [
+            HotelOffersResponse(data=[]) if isinstance(result, Exception) else result
+            for result in results
+        ]
+    
+    async def _search_hotel_offers_coalesced(
+        self, requests: List[HotelOffersRequest], priority: int = PRIORITY_BATCH
+    ) -> List[Union[HotelOffersResponse, Exception]]:
+        """Coalesce offer searches into as few upstream calls as possible.
+        
+        Returns one response per request, or the error that left a request
+        without any results.
+        """
+        request_params = [request.as_params for request in requests]
+        
+        # Group requests whose query differs only in hotelIds
+        groups: Dict[tuple, List[int]] = {}
+        for i, params in enumerate(request_params):
+            groups.setdefault(_offers_group_key(params), []).append(i)
+        
+        async def fetch_offers(params: Dict[str, Any]) -> List[Dict[str, Any]]:
+            response = await self._make_request("GET", _HOTEL_OFFERS, params)
+            return response.get("data") or []
+        
+        # One call per chunk of distinct hotel IDs in each group
+        calls = []
+        for key, indices in groups.items():
+            hotel_ids = sorted({hotel_id for i in indices for hotel_id in requests[i].hotel_ids})
+            for start in range(0, len(hotel_ids), MAX_HOTEL_IDS_PER_OFFERS_REQUEST):
+                chunk = hotel_ids[start:start + MAX_HOTEL_IDS_PER_OFFERS_REQUEST]
+                calls.append((key, chunk, {**request_params[indices[0]], "hotelIds": ",".join(chunk)}))
+        
+        results = await self._gather_bounded([fetch_offers(params) for _, _, params in calls], priority)
+        
+        items_by_hotel: Dict[tuple, Dict[str, Dict[str, Any]]] = {key: {} for key in groups}
+        failed_hotels: Dict[tuple, Dict[str, Exception]] = {key: {} for key in groups}
+        failures = []
+        for (key, chunk, _), result in zip(calls, results):
             if isinstance(result, Exception):
-                logger.error(f"Error searching offers {i}: {result}")
-                # Return empty response for failed requests
-                responses.append(HotelOffersResponse(data=[]))
-            else:
-                responses.append(result)
+                failures.append(result)
+                failed_hotels[key].update(dict.fromkeys(chunk, result))
+                continue
+            for item in result:
+                hotel_id = (item.get("hotel") or {}).get("hotelId")
+                if hotel_id:
+                    items_by_hotel[key][hotel_id] = item
+        
+        _log_batch_failures("Hotel offers search", len(results), failures)
+        
+        # Scatter coalesced results back to the original requests
+        responses: List[Union[HotelOffersResponse, Exception, None]] = [None] * len(requests)
+        retry_indices = []
+        for key, indices in groups.items():
+            failed = failed_hotels[key]
+            for i in indices:
+                hotel_ids = requests[i].hotel_ids
+                if failed and not failed.keys().isdisjoint(hotel_ids):
+                    if len(indices) > 1:
+                        retry_indices.append(i)
+                        continue
+                    if all(hotel_id in failed for hotel_id in hotel_ids):
+                        responses[i] = failed[hotel_ids[0]]
+                        continue
+                hotel_items = items_by_hotel[key]
+                responses[i] = HotelOffersResponse.model_validate({
+                    "data": [hotel_items[h] for h in hotel_ids if h in hotel_items]
+                })
+        
+        if retry_indices:
+            retried = await self._gather_bounded(
+                [fetch_offers(request_params[i]) for i in retry_indices], priority
+            )
+            failures = []
+            for i, result in zip(retry_indices, retried):
+                if isinstance(result, Exception):
+                    failures.append(result)
+                    responses[i] = result
+                else:
+                    responses[i] = HotelOffersResponse.model_validate({"data": result})
+            _log_batch_failures("Hotel offers retry", len(retried), failures)
         
         return responses
     
-    def shutdown(self):
-        """Shutdown the client pool."""
-        self.client_pool.shutdown()
+    async def aclose(self) -> None:
+        """Stop the token refresh and close the shared HTTP session and its pooled connections."""
+        if self._token_refresher is not None:
+            self._token_refresher.cancel()
+            try:
+                await self._token_refresher
+            except asyncio.CancelledError:
+                pass
+            self._token_refresher = None
+        await self._http.aclose()
+    
+    async def __aenter__(self) -> "AmadeusClient":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
     
     # DISABLED: Hotel Booking v2 functionality
     # This method is implemented but disabled for security and compliance reasons
@@ -410,7 +863,7 @@ class AmadeusClient:
     # async def book_hotel(self, request: HotelBookingRequest) -> HotelBookingResponse:
     #     """Book a hotel using Hotel Booking v2 API (DISABLED)."""
     #     try:
-    #         # Prepare booking data for the SDK
+    #         # Prepare booking data for the API
     #         booking_data = {
     #             "offerId": request.offer_id,
     #             "guests": [guest.dict(by_alias=True) for guest in request.guests],
@@ -422,15 +875,72 @@ class AmadeusClient:
     #         if request.travel_agent:
     #             booking_data["travelAgent"] = request.travel_agent.dict(by_alias=True)
     #         
-    #         # Make the booking API call using the SDK
-    #         response = self.client.booking.hotel_orders.post(booking_data)
+    #         # Make the booking API call over the shared HTTP session
+    #         response = await self._make_request(
+    #             "POST", _HOTEL_ORDERS, json={"data": booking_data}
+    #         )
     #         
-    #         # Convert SDK response to our model
+    #         # Convert API response to our model
     #         response_data = {
-    #             "data": response.data
+    #             "data": response.get("data") or {}
     #         }
     #         return HotelBookingResponse(**response_data)
     #         
     #     except Exception as e:
-    #         logger.error(f"Error booking hotel: {e}")
-    #         self._handle_sdk_error(e)
\ No newline at end of file
+    #         logger.error("Error booking hotel: %s", e)
+    #         self._handle_error(e)
+
+
+# Token caches shared by every client with the same credentials and host,
+# keyed by a hash so API keys are not kept around as dict keys
+_token_caches: Dict[str, AmadeusTokenCache] = {}
+
+
+def get_token_cache(api_key: str, base_url: str) -> AmadeusTokenCache:
+    """Get the token cache shared by all clients for this API key and host."""
+    key = hashlib.sha256(f"{api_key}\0{base_url.rstrip('/')}".encode()).hexdigest()
+    cache = _token_caches.get(key)
+    if cache is None:
+        cache = _token_caches[key] = AmadeusTokenCache()
+    return cache
+
+
+# Global Amadeus client instance
+_amadeus_client: Optional[AmadeusClient] = None
+
+
+def get_amadeus_client() -> AmadeusClient:
+    """Get the global Amadeus client instance."""
+    global _amadeus_client
+    if _amadeus_client is None:
+        settings = get_app_settings()
+        _amadeus_client = AmadeusClient(
+            api_key=settings.amadeus_api_key,
+            api_secret=settings.amadeus_api_secret,
+            base_url=settings.amadeus_base_url,
+            timeout=settings.api_timeout,
+            max_retries=settings.max_retries,
+            retry_base_delay=settings.retry_base_delay,
+            retry_max_delay=settings.retry_max_delay,
+            retry_jitter=settings.retry_jitter,
+            pool_size=settings.client_pool_size,
+            burst_limit=settings.connection_burst_limit,
+            geo_cache_ttl=settings.geo_cache_ttl,
+            geo_cache_max_size=settings.geo_cache_max_size,
+            health_check_ttl=settings.health_check_ttl,
+            http2=settings.enable_http2,
+            max_concurrent_requests=settings.max_concurrent_requests,
+            priority_aging_seconds=settings.priority_aging_ms / 1000,
+            rate_limit_per_second=settings.rate_limit_per_second,
+            offers_batch_window=settings.offers_batch_window_ms / 1000,
+            token_cache=get_token_cache(settings.amadeus_api_key, settings.amadeus_base_url),
+        )
+    return _amadeus_client
+
+
+async def close_amadeus_client() -> None:
+    """Close the global Amadeus client instance, if one was created."""
+    global _amadeus_client
+    if _amadeus_client is not None:
+        await _amadeus_client.aclose()
+        _amadeus_client = None
@@ -3,112 +3,133 @@ Caching layer for Amadeus Hotels API responses.
 """
 
 import asyncio
-import hashlib
-import json
 import logging
 import time
+from collections import OrderedDict
 from typing import Any, Dict, Optional, Union
 from threading import Lock
 from dataclasses import dataclass
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+def _key_part(value: Any) -> str:
+    """Deterministic cache-key fragment for one argument.
+    
+    Request models contribute their cached query parameters, so building a
+    key for them costs one short string join instead of a JSON round trip.
+    """
+    params = getattr(value, "as_params", None)
+    if isinstance(params, dict):
+        return "&".join(f"{k}={v}" for k, v in params.items())
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return repr(value)
+    return orjson.dumps(value, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _build_key(args: tuple, kwargs: Dict[str, Any]) -> str:
+    """Join the key fragments of positional and keyword arguments."""
+    parts = [_key_part(arg) for arg in args]
+    if kwargs:
+        parts.extend(f"{name}={_key_part(kwargs[name])}" for name in sorted(kwargs))
+    return "|".join(parts)
+
+
+@dataclass(slots=True)
 class CacheEntry:
     """Cache entry with metadata."""
     data: Any
     timestamp: float
     ttl: int
+    soft_ttl: Optional[float] = None
     
-    def is_expired(self) -> bool:
+    def is_expired(self, now: Optional[float] = None) -> bool:
         """Check if the cache entry is expired."""
-        return time.time() - self.timestamp > self.ttl
+        if now is None:
+            now = time.monotonic()
+        return now - self.timestamp > self.ttl
+    
+    def is_stale(self) -> bool:
+        """Check if the entry is past its soft TTL and should be refreshed."""
+        return self.soft_ttl is not None and time.monotonic() - self.timestamp > self.soft_ttl
 
 
 class ThreadSafeCache:
-    """Thread-safe cache implementation with TTL support."""
+    """Thread-safe LRU cache implementation with TTL support."""
     
     def __init__(self, max_size: int = 1000, default_ttl: int = 300):
         self.max_size = max_size
         self.default_ttl = default_ttl
-        self._cache: Dict[str, CacheEntry] = {}
+        # Ordered from least to most recently used
+        self._cache: OrderedDict[str, CacheEntry] = OrderedDict()
         self._lock = Lock()
-        self._access_times: Dict[str, float] = {}
     
     def _generate_key(self, *args, **kwargs) -> str:
         """Generate a cache key from arguments."""
-        # Create a deterministic key from the arguments
-        key_data = {
-            'args': args,
-            'kwargs': sorted(kwargs.items()) if kwargs else {}
-        }
-        key_string = json.dumps(key_data, sort_keys=True, default=str)
-        return hashlib.md5(key_string.encode()).hexdigest()
+        return _build_key(args, kwargs)
     
     def get(self, key: str) -> Optional[Any]:
         """Get a value from the cache."""
+        entry = self.get_entry(key)
+        return entry.data if entry is not None else None
+    
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """Get a live cache entry, including its freshness metadata."""
         with self._lock:
-            if key not in self._cache:
+            entry = self._cache.get(key)
+            if entry is None:
                 return None
             
-            entry = self._cache[key]
             if entry.is_expired():
                 # Remove expired entry
                 del self._cache[key]
-                if key in self._access_times:
-                    del self._access_times[key]
                 return None
             
-            # Update access time for LRU
-            self._access_times[key] = time.time()
-            return entry.data
+            # Mark as most recently used
+            self._cache.move_to_end(key)
+            return entry
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Set a value in the cache."""
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, soft_ttl: Optional[float] = None) -> None:
+        """Set a value in the cache; after ``soft_ttl`` seconds it is served but reported stale."""
+        now = time.monotonic()
         with self._lock:
             # Remove expired entries first
-            self._cleanup_expired()
-            
-            # If cache is full, remove least recently used entry
-            if len(self._cache) >= self.max_size and key not in self._cache:
-                self._evict_lru()
+            self._cleanup_expired(now)
             
             # Set the new entry
             entry_ttl = ttl if ttl is not None else self.default_ttl
             self._cache[key] = CacheEntry(
                 data=value,
-                timestamp=time.time(),
-                ttl=entry_ttl
+                timestamp=now,
+                ttl=entry_ttl,
+                soft_ttl=soft_ttl,
             )
-            self._access_times[key] = time.time()
-    
-    def _cleanup_expired(self) -> None:
-        """Remove expired entries from the cache."""
-        expired_keys = [
-            key for key, entry in self._cache.items()
-            if entry.is_expired()
-        ]
-        for key in expired_keys:
-            del self._cache[key]
-            if key in self._access_times:
-                del self._access_times[key]
+            self._cache.move_to_end(key)
+            
+            # If cache is full, remove least recently used entries
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
     
-    def _evict_lru(self) -> None:
-        """Evict the least recently used entry."""
-        if not self._access_times:
-            return
+    def _cleanup_expired(self, now: Optional[float] = None) -> None:
+        """Drop expired entries from the least recently used end of the cache.
         
-        # Find the least recently used key
-        lru_key = min(self._access_times.keys(), key=lambda k: self._access_times[k])
-        del self._cache[lru_key]
-        del self._access_times[lru_key]
+        Stops at the first live entry; expired entries further in are removed
+        when they are next read or evicted.
+        """
+        if now is None:
+            now = time.monotonic()
+        while self._cache:
+            key, entry = next(iter(self._cache.items()))
+            if not entry.is_expired(now):
+                break
+            del self._cache[key]
     
     def clear(self) -> None:
         """Clear all cache entries."""
         with self._lock:
             self._cache.clear()
-            self._access_times.clear()
     
     def size(self) -> int:
         """Get the current cache size."""
@@ -127,23 +148,34 @@ class ThreadSafeCache:
 
 
 class AmadeusCache:
-    """Cache wrapper for Amadeus API responses."""
+    """Cache wrapper for Amadeus API responses.
     
-    def __init__(self, max_size: int = 1000, default_ttl: int = 300):
+    Entries older than ``stale_ratio`` of their TTL are still served, but
+    trigger one background refresh (stale-while-revalidate). Empty results
+    are kept for at most ``negative_ttl`` seconds so a newly listed hotel or
+    freshly opened inventory shows up quickly.
+    """
+    
+    def __init__(
+        self,
+        max_size: int = 1000,
+        default_ttl: int = 300,
+        stale_ratio: Optional[float] = 0.8,
+        negative_ttl: Optional[int] = 30,
+    ):
         self.cache = ThreadSafeCache(max_size=max_size, default_ttl=default_ttl)
+        self.stale_ratio = stale_ratio
+        self.negative_ttl = negative_ttl
         self._hit_count = 0
         self._miss_count = 0
+        # Calls in flight per key, so concurrent misses share one upstream call
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Background refreshes of stale entries, at most one per key
+        self._refreshing: Dict[str, asyncio.Task] = {}
     
     def _get_cache_key(self, method: str, *args, **kwargs) -> str:
         """Generate a cache key for API method calls."""
-        # Create a deterministic key from method name and arguments
-        key_data = {
-            'method': method,
-            'args': args,
-            'kwargs': sorted(kwargs.items()) if kwargs else {}
-        }
-        key_string = json.dumps(key_data, sort_keys=True, default=str)
-        return hashlib.md5(key_string.encode()).hexdigest()
+        return f"{method}|{_build_key(args, kwargs)}"
     
     async def get_or_set(
         self,
@@ -156,31 +188,94 @@ class AmadeusCache:
         """Get from cache or call function and cache result."""
         cache_key = self._get_cache_key(method, *args, **kwargs)
         
-        # Try to get from cache first
-        cached_result = self.cache.get(cache_key)
-        if cached_result is not None:
+        while True:
+            # Try to get from cache first
+            entry = self.cache.get_entry(cache_key)
+            if entry is not None:
+                self._hit_count += 1
+                logger.debug("Cache hit for %s", method)
+                if entry.is_stale():
+                    self._refresh_in_background(cache_key, method, callable_func, args, kwargs, ttl)
+                return entry.data
+            
+            # Share the result (or error) of an identical call already in flight
+            inflight = self._inflight.get(cache_key)
+            if inflight is None:
+                break
+            try:
+                result = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if inflight.cancelled():
+                    # The call we were waiting on was cancelled; try again
+                    continue
+                raise
             self._hit_count += 1
-            logger.debug(f"Cache hit for {method}")
-            return cached_result
+            logger.debug("Cache hit for %s from in-flight call", method)
+            return result
         
         # Cache miss - call the function
         self._miss_count += 1
-        logger.debug(f"Cache miss for {method}")
+        logger.debug("Cache miss for %s", method)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
         
         try:
-            # Call the actual function
-            if asyncio.iscoroutinefunction(callable_func):
-                result = await callable_func(*args, **kwargs)
-            else:
-                result = callable_func(*args, **kwargs)
-            
-            # Cache the result
-            self.cache.set(cache_key, result, ttl=ttl)
-            return result
-            
+            result = await self._call(callable_func, args, kwargs)
         except Exception as e:
-            logger.error(f"Error calling {method}: {e}")
+            logger.error("Error calling %s: %s", method, e)
+            future.set_exception(e)
+            # Mark the error as retrieved in case nobody was waiting on it
+            future.exception()
             raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            self._store(cache_key, result, ttl)
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(cache_key, None)
+    
+    @staticmethod
+    async def _call(callable_func, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """Call the actual function, awaiting it if it is a coroutine function."""
+        if asyncio.iscoroutinefunction(callable_func):
+            return await callable_func(*args, **kwargs)
+        return callable_func(*args, **kwargs)
+    
+    @staticmethod
+    def _is_empty(result: Any) -> bool:
+        """Check whether a result holds no data (e.g. a search with no hotels)."""
+        data = getattr(result, "data", result)
+        return isinstance(data, (list, dict)) and not data
+    
+    def _store(self, cache_key: str, result: Any, ttl: Optional[int]) -> None:
+        """Cache a result, shortening the TTL for empty results."""
+        entry_ttl = ttl if ttl is not None else self.cache.default_ttl
+        if self.negative_ttl is not None and self._is_empty(result):
+            entry_ttl = min(entry_ttl, self.negative_ttl)
+        soft_ttl = entry_ttl * self.stale_ratio if self.stale_ratio is not None else None
+        self.cache.set(cache_key, result, ttl=entry_ttl, soft_ttl=soft_ttl)
+    
+    def _refresh_in_background(
+        self, cache_key: str, method: str, callable_func, args: tuple, kwargs: Dict[str, Any], ttl: Optional[int]
+    ) -> None:
+        """Start refreshing a stale entry unless a refresh or fill is already running."""
+        if cache_key in self._refreshing or cache_key in self._inflight:
+            return
+        
+        async def refresh() -> None:
+            try:
+                self._store(cache_key, await self._call(callable_func, args, kwargs), ttl)
+                logger.debug("Refreshed stale cache entry for %s", method)
+            except Exception as e:
+                # Keep serving the stale entry until it expires
+                logger.warning("Background refresh for %s failed: %s", method, e)
+        
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refreshing[cache_key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(cache_key, None))
     
     def invalidate_pattern(self, pattern: str) -> int:
         """Invalidate cache entries matching a pattern."""
@@ -193,8 +288,6 @@ class AmadeusCache:
             ]
             for key in keys_to_remove:
                 del self.cache._cache[key]
-                if key in self.cache._access_times:
-                    del self.cache._access_times[key]
             return len(keys_to_remove)
     
     def clear(self) -> None:
@@ -2,8 +2,11 @@
 Configuration management for the MCP Amadeus Hotels server.
 """
 
+import atexit
 import os
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional, List, Union
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
@@ -24,21 +27,45 @@ class Settings(BaseSettings):
     # Server Configuration
     port: int = Field(3000, env="PORT", description="Server port")
     host: str = Field("0.0.0.0", env="HOST", description="Server host")
+    http_limit_concurrency: int = Field(1000, env="HTTP_LIMIT_CONCURRENCY", description="Connections served at once before new requests are refused with 503 (0 disables)")
+    http_backlog: int = Field(2048, env="HTTP_BACKLOG", description="Pending connections queued by the kernel before the server accepts them")
+    http_keep_alive_timeout: int = Field(5, env="HTTP_KEEP_ALIVE_TIMEOUT", description="Seconds an idle client connection is kept open")
     log_level: str = Field("INFO", env="LOG_LEVEL", description="Logging level")
+    workers: int = Field(1, env="WORKERS", description="Server processes for the streamable HTTP transport")
+    json_response: bool = Field(False, env="JSON_RESPONSE", description="Answer streamable HTTP requests with JSON instead of SSE streams")
+    stateless_http: bool = Field(False, env="STATELESS_HTTP", description="Serve each streamable HTTP request without a session, as needed behind several workers")
+    redis_url: Optional[str] = Field(None, env="REDIS_URL", description="Redis URL for a shared, persistent resumability event store (in-memory when unset)")
+    event_store_max_events: int = Field(100, env="EVENT_STORE_MAX_EVENTS", description="Events kept per stream for resuming a dropped connection")
+    event_store_ttl: int = Field(3600, env="EVENT_STORE_TTL", description="Seconds a Redis event stream is kept after its last event")
     
     # API Configuration
     api_timeout: float = Field(30.0, env="API_TIMEOUT", description="API request timeout")
     max_retries: int = Field(3, env="MAX_RETRIES", description="Maximum retry attempts")
+    retry_base_delay: float = Field(1.0, env="RETRY_BASE_DELAY", description="Initial retry backoff in seconds, doubled per attempt")
+    retry_max_delay: float = Field(30.0, env="RETRY_MAX_DELAY", description="Upper bound on a single retry backoff in seconds")
+    retry_jitter: float = Field(0.5, env="RETRY_JITTER", description="Fraction of each backoff randomly shaved off to spread retries")
     
     # Multithreading Configuration
-    client_pool_size: int = Field(5, env="CLIENT_POOL_SIZE", description="Number of concurrent API clients")
+    client_pool_size: int = Field(5, env="CLIENT_POOL_SIZE", description="Keep-alive HTTP connections kept warm to the Amadeus API")
+    connection_burst_limit: int = Field(15, env="CONNECTION_BURST_LIMIT", description="Extra connections allowed above the pool size under load")
     max_concurrent_requests: int = Field(10, env="MAX_CONCURRENT_REQUESTS", description="Maximum concurrent API requests")
     enable_connection_pooling: bool = Field(True, env="ENABLE_CONNECTION_POOLING", description="Enable HTTP connection pooling")
+    priority_aging_ms: int = Field(500, env="PRIORITY_AGING_MS", description="Wait after which a queued batch request gains one priority level")
+    enable_http2: bool = Field(True, env="ENABLE_HTTP2", description="Multiplex API requests over HTTP/2")
+    rate_limit_per_second: float = Field(0.0, env="RATE_LIMIT_PER_SECOND", description="Ceiling for the adaptive client-side request rate (0 disables)")
+    offers_batch_window_ms: int = Field(0, env="OFFERS_BATCH_WINDOW_MS", description="Window in which concurrent offer searches for the same stay share one upstream call (0 disables)")
     
     # Caching Configuration
     enable_caching: bool = Field(False, env="ENABLE_CACHING", description="Enable response caching")
     cache_ttl: int = Field(300, env="CACHE_TTL", description="Cache time-to-live in seconds")
     cache_max_size: int = Field(1000, env="CACHE_MAX_SIZE", description="Maximum cache entries")
+    cache_stale_ratio: float = Field(0.8, env="CACHE_STALE_RATIO", description="Fraction of the TTL after which a hit triggers a background refresh")
+    cache_negative_ttl: int = Field(30, env="CACHE_NEGATIVE_TTL", description="Seconds to cache empty results")
+    geo_cache_ttl: int = Field(600, env="GEO_CACHE_TTL", description="Seconds to cache hotel-by-location results (0 disables)")
+    geo_cache_max_size: int = Field(4096, env="GEO_CACHE_MAX_SIZE", description="Maximum cached hotel-by-location results")
+    warm_up_on_startup: bool = Field(True, env="WARM_UP_ON_STARTUP", description="Fetch an API token before serving, failing fast on rejected credentials")
+    token_refresh_in_background: bool = Field(True, env="TOKEN_REFRESH_IN_BACKGROUND", description="Renew the API access token before it expires instead of on the request path")
+    health_check_ttl: float = Field(30.0, env="HEALTH_CHECK_TTL", description="Seconds to reuse a successful health check")
     
     # Authentication Configuration
     auth_enabled: bool = Field(True, env="AUTH_ENABLED", description="Enable authentication")
@@ -67,15 +94,46 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
+# Background thread that writes queued log records, and the process it runs in
+_log_listener: Optional[QueueListener] = None
+_log_listener_pid: Optional[int] = None
+
+
+@atexit.register
+def _stop_log_listener() -> None:
+    """Flush queued log records on interpreter exit."""
+    if _log_listener is not None and _log_listener_pid == os.getpid():
+        _log_listener.stop()
+
+
 def setup_logging(log_level: str = "INFO") -> None:
-    """Set up logging configuration."""
+    """Set up logging configuration.
+    
+    Records are queued and written to stderr by a background thread, so a
+    slow console never blocks the event loop. Call again after forking (e.g.
+    in a Gunicorn ``post_fork`` hook): threads do not survive a fork.
+    """
+    global _log_listener, _log_listener_pid
     numeric_level = getattr(logging, log_level.upper(), logging.INFO)
+    root = logging.getLogger()
+    root.setLevel(numeric_level)
     
-    logging.basicConfig(
-        level=numeric_level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    if _log_listener is None or _log_listener_pid != os.getpid():
+        for handler in root.handlers[:]:
+            if isinstance(handler, QueueHandler):
+                root.removeHandler(handler)
+        
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        ))
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        root.addHandler(QueueHandler(log_queue))
+        
+        _log_listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _log_listener_pid = os.getpid()
+        _log_listener.start()
     
     # Reduce noise from httpx
     logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -0,0 +1,162 @@
+"""
+Event stores for resumable streamable HTTP sessions.
+"""
+
+import logging
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import Optional
+
+import mcp.types as types
+from mcp.server.streamable_http import EventCallback, EventId, EventMessage, EventStore, StreamId
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class EventEntry:
+    """An event stored for replay, with its position in its stream."""
+    event_id: EventId
+    stream_id: StreamId
+    message: Optional[types.JSONRPCMessage]
+    position: int
+
+
+class InMemoryEventStore(EventStore):
+    """In-memory event store for resumable streamable HTTP sessions.
+    
+    Keeps the most recent ``max_events_per_stream`` events of the last
+    ``max_streams`` streams. Events are indexed by ID, so a replay starts at
+    the right position without scanning the stream's history.
+    """
+    
+    def __init__(self, max_events_per_stream: int = 100, max_streams: int = 1000):
+        self.max_events_per_stream = max_events_per_stream
+        self.max_streams = max_streams
+        # Streams in creation order, oldest first
+        self.streams: dict[StreamId, deque[EventEntry]] = {}
+        self.event_index: dict[EventId, EventEntry] = {}
+    
+    async def store_event(self, stream_id: StreamId, message: Optional[types.JSONRPCMessage]) -> EventId:
+        """Store an event and return its generated ID."""
+        events = self.streams.get(stream_id)
+        if events is None:
+            if len(self.streams) >= self.max_streams:
+                # Forget the oldest stream entirely
+                oldest = self.streams.pop(next(iter(self.streams)))
+                for evicted in oldest:
+                    self.event_index.pop(evicted.event_id, None)
+            events = self.streams[stream_id] = deque()
+        
+        position = events[-1].position + 1 if events else 0
+        entry = EventEntry(uuid.uuid4().hex, stream_id, message, position)
+        
+        if len(events) >= self.max_events_per_stream:
+            # Drop the oldest event of this stream
+            evicted = events.popleft()
+            self.event_index.pop(evicted.event_id, None)
+        events.append(entry)
+        self.event_index[entry.event_id] = entry
+        return entry.event_id
+    
+    async def replay_events_after(self, last_event_id: EventId, send_callback: EventCallback) -> Optional[StreamId]:
+        """Send the events stored after ``last_event_id`` in its stream."""
+        last = self.event_index.get(last_event_id)
+        if last is None:
+            logger.warning("Event ID %s not found in event store", last_event_id)
+            return None
+        
+        events = self.streams[last.stream_id]
+        start = last.position - events[0].position + 1
+        # store_event never awaits, so this copy is consistent; iterate the
+        # copy because new events may be stored while we await the callback
+        for entry in list(islice(events, start, None)):
+            # Priming events carry no message
+            if entry.message is not None:
+                await send_callback(EventMessage(entry.message, entry.event_id))
+        return last.stream_id
+
+
+def _entry_id_key(entry_id: str) -> tuple[int, int]:
+    """Sort key of a Redis stream entry ID (``<milliseconds>-<sequence>``)."""
+    millis, _, sequence = entry_id.partition("-")
+    return int(millis), int(sequence or 0)
+
+
+class RedisEventStore(EventStore):
+    """Event store backed by Redis Streams, shared by all server workers.
+    
+    Each MCP stream maps to one Redis stream, trimmed to roughly
+    ``max_events_per_stream`` entries and expired ``ttl`` seconds after its
+    last event. Event IDs are ``<stream id>:<Redis entry id>``, so a replay
+    reads the remaining entries with a single XRANGE, after checking that the
+    last seen entry hasn't been trimmed. Requires the optional
+    ``redis`` package.
+    """
+    
+    def __init__(
+        self,
+        url: str,
+        max_events_per_stream: int = 100,
+        ttl: int = 3600,
+        key_prefix: str = "mcp:events:",
+    ):
+        if aioredis is None:
+            raise RuntimeError("RedisEventStore requires the 'redis' package (pip install redis)")
+        self._redis = aioredis.Redis.from_url(url)
+        self.max_events_per_stream = max_events_per_stream
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+    
+    async def store_event(self, stream_id: StreamId, message: Optional[types.JSONRPCMessage]) -> EventId:
+        """Append an event to the stream's Redis stream and return its ID."""
+        key = self.key_prefix + stream_id
+        # Priming events carry no message
+        data = message.model_dump_json(by_alias=True, exclude_none=True) if message is not None else ""
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.xadd(key, {"data": data}, maxlen=self.max_events_per_stream, approximate=True)
+            pipe.expire(key, self.ttl)
+            entry_id, _ = await pipe.execute()
+        return f"{stream_id}:{entry_id.decode()}"
+    
+    async def replay_events_after(self, last_event_id: EventId, send_callback: EventCallback) -> Optional[StreamId]:
+        """Send the events stored after ``last_event_id`` in its stream."""
+        stream_id, sep, entry_id = last_event_id.rpartition(":")
+        if not sep or not stream_id:
+            logger.warning("Event ID %s not found in event store", last_event_id)
+            return None
+        
+        key = self.key_prefix + stream_id
+        # XADD trims the stream approximately; if the event itself was
+        # trimmed, the events between it and the oldest retained one are gone
+        # too, so report it as unknown rather than replay with a gap
+        oldest = await self._redis.xrange(key, min="-", max="+", count=1)
+        try:
+            missing = not oldest or _entry_id_key(oldest[0][0].decode()) > _entry_id_key(entry_id)
+        except ValueError:
+            missing = True
+        if missing:
+            logger.warning("Event ID %s not found in event store", last_event_id)
+            return None
+        
+        for event_id, fields in await self._redis.xrange(key, min=f"({entry_id}", max="+"):
+            data = fields[b"data"]
+            if data:
+                await send_callback(
+                    EventMessage(
+                        types.JSONRPCMessage.model_validate_json(data),
+                        f"{stream_id}:{event_id.decode()}",
+                    )
+                )
+        return stream_id
+    
+    async def aclose(self) -> None:
+        """Close the Redis connection pool."""
+        await self._redis.aclose()
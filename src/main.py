@@ -2,103 +2,170 @@
 Main MCP server for Amadeus Hotels API integration.
 """
 
+import asyncio
 import contextlib
 import logging
+import os
 import sys
+import time
 from collections.abc import AsyncIterator
-from typing import Any, Optional
+from typing import Any, Dict, Optional, get_args
 
 import click
 import mcp.types as types
 from mcp.server.lowlevel import Server
+from mcp.server.streamable_http import EventStore
 from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
-from mcp.server.auth.provider import TokenVerifier
-from mcp.server.auth.middleware.bearer_auth import BearerAuthBackend
+from mcp.server.auth.provider import AccessToken, TokenVerifier
+from mcp.server.auth.middleware.bearer_auth import AuthenticatedUser, BearerAuthBackend
 from starlette.applications import Starlette
-from starlette.authentication import AuthenticationError
+from starlette.authentication import AuthCredentials, AuthenticationError
 from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from starlette.requests import HTTPConnection
 from starlette.routing import Mount
-from starlette.types import Receive, Scope, Send
+from starlette.types import ASGIApp, Receive, Scope, Send
 import uvicorn
 
-try:
-    from .config import get_app_settings, setup_logging
-    from .tools import AmadeusHotelsTools
-except ImportError:
-    # Handle direct execution
-    import sys
-    import os
-    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-    from config import get_app_settings, setup_logging
-    from tools import AmadeusHotelsTools
+from .config import get_app_settings, setup_logging
+from .tools import AmadeusHotelsTools
+from .amadeus_client import close_amadeus_client
+from .event_store import InMemoryEventStore, RedisEventStore
+from .models import BoardType, HotelSource, PaymentPolicy, RadiusUnit, StarRating
 
 logger = logging.getLogger(__name__)
 
 
-class ConditionalAuthMiddleware(BaseHTTPMiddleware):
-    """Middleware that conditionally applies authentication based on path."""
+def install_uvloop() -> bool:
+    """Use uvloop for the event loop when it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+def raise_open_file_limit(target: int = 65536) -> None:
+    """Raise the soft open-file limit towards ``target`` so connection bursts don't hit EMFILE."""
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY:
+        target = min(target, hard)
+    if soft == resource.RLIM_INFINITY or soft >= target:
+        return
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        logger.debug("Raised open file limit from %d to %d", soft, target)
+    except (ValueError, OSError) as e:
+        logger.warning("Could not raise open file limit: %s", e)
+
+
+_MISSING_AUTH_BODY = b"Unauthorized: Missing Authorization header. Please include 'Authorization: Bearer <api_key>' header."
+_INVALID_AUTH_BODY = b"Unauthorized: Invalid API key."
+
+
+async def _send_unauthorized(send: Send, body: bytes) -> None:
+    """Send a plain-text 401 response straight to the ASGI server."""
+    await send({
+        "type": "http.response.start",
+        "status": 401,
+        # A fresh list each time: outer middleware may append to it
+        "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+            (b"www-authenticate", b"Bearer"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class ConditionalAuthMiddleware:
+    """Middleware that conditionally applies authentication based on path.
+    
+    Written as plain ASGI rather than BaseHTTPMiddleware, so authenticated
+    requests pass straight through without an extra task and memory stream.
+    """
     
     # Public endpoints that don't require authentication
-    PUBLIC_PATHS = [
+    PUBLIC_PATHS: frozenset[str] = frozenset({
         "/",  # Root endpoint for health checks
         "/health",
         "/healthz",
         "/favicon.ico",
         "/register",  # MCP client registration endpoint
-    ]
+    })
+    PUBLIC_PREFIXES: tuple[str, ...] = ("/.well-known/", "/mcp/.well-known/")
     
-    def __init__(self, app, auth_backend):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, auth_backend):
+        self.app = app
         self.auth_backend = auth_backend
+        # The SDK's bearer backend is checked inline against the raw headers;
+        # any other backend goes through its authenticate()
+        self._token_verifier: Optional[TokenVerifier] = (
+            auth_backend.token_verifier if isinstance(auth_backend, BearerAuthBackend) else None
+        )
     
     def _is_public_path(self, path: str) -> bool:
         """Check if a path is public and doesn't require authentication."""
-        return (
-            path in self.PUBLIC_PATHS or
-            path.startswith("/.well-known/") or
-            path.startswith("/mcp/.well-known/")
-        )
+        return path in self.PUBLIC_PATHS or path.startswith(self.PUBLIC_PREFIXES)
+    
+    async def _authenticate_bearer(self, scope: Scope) -> Optional[tuple[AuthCredentials, AuthenticatedUser]]:
+        """Apply BearerAuthBackend's checks to the ASGI headers without building a request."""
+        header = next((value for name, value in scope["headers"] if name.lower() == b"authorization"), None)
+        if header is None or header[:7].lower() != b"bearer ":
+            return None
+        
+        access_token = await self._token_verifier.verify_token(header[7:].decode("latin-1"))
+        if not access_token:
+            return None
+        if access_token.expires_at and access_token.expires_at < int(time.time()):
+            return None
+        return AuthCredentials(access_token.scopes), AuthenticatedUser(access_token)
     
-    async def dispatch(self, request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Apply authentication only for protected paths."""
-        path = request.url.path
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
         # Skip authentication for OPTIONS requests (CORS preflight)
-        if request.method == "OPTIONS":
-            return await call_next(request)
+        if scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        
+        path = scope["path"]
         
         # Skip authentication for public paths
         if self._is_public_path(path):
             # Set anonymous user for public paths
-            request.scope["user"] = None
-            request.scope["auth"] = None
-            return await call_next(request)
+            scope["user"] = None
+            scope["auth"] = None
+            await self.app(scope, receive, send)
+            return
         
-        # Apply authentication for protected paths using SDK's BearerAuthBackend
+        # Apply authentication for protected paths
         try:
-            auth_result = await self.auth_backend.authenticate(request)
-            if auth_result:
-                request.scope["user"] = auth_result[0]
-                request.scope["auth"] = auth_result[1]
+            if self._token_verifier is not None:
+                auth_result = await self._authenticate_bearer(scope)
             else:
-                # No authentication provided - reject
-                logger.warning(f"Unauthorized request to {path} - No Authorization header")
-                return Response(
-                    "Unauthorized: Missing Authorization header. Please include 'Authorization: Bearer <api_key>' header.",
-                    status_code=401,
-                    headers={"WWW-Authenticate": "Bearer"}
-                )
+                auth_result = await self.auth_backend.authenticate(HTTPConnection(scope))
         except AuthenticationError as exc:
-            logger.warning(f"Unauthorized request to {path} - {exc}")
-            return Response(
-                "Unauthorized: Invalid API key.",
-                status_code=401,
-                headers={"WWW-Authenticate": "Bearer"}
-            )
+            logger.warning("Unauthorized request to %s - %s", path, exc)
+            await _send_unauthorized(send, _INVALID_AUTH_BODY)
+            return
         
-        return await call_next(request)
+        if not auth_result:
+            # No authentication provided - reject
+            logger.warning("Unauthorized request to %s - No Authorization header", path)
+            await _send_unauthorized(send, _MISSING_AUTH_BODY)
+            return
+        
+        scope["auth"], scope["user"] = auth_result
+        await self.app(scope, receive, send)
 
 
 class SimpleTokenVerifier(TokenVerifier):
@@ -106,46 +173,171 @@ class SimpleTokenVerifier(TokenVerifier):
     
     def __init__(self, valid_api_keys: list[str]):
         self.valid_api_keys = set(valid_api_keys)
-    
-    async def verify_token(self, token: str) -> Optional[Any]:
-        """Verify the provided token and return AccessToken compatible with MCP SDK's BearerAuthBackend."""
-        if token in self.valid_api_keys:
-            from mcp.server.auth.provider import AccessToken
-            # Return AccessToken as expected by BearerAuthBackend
-            # The BearerAuthBackend expects AccessToken with expires_at, but we can return None for non-expiring tokens
-            return AccessToken(
-                token=token,
-                client_id=f"user_{hash(token) % 10000}",
+        # The key set is fixed, so build each key's AccessToken once and
+        # answer every request with a dictionary lookup
+        self._access_tokens = {
+            key: AccessToken(
+                token=key,
+                client_id=f"user_{hash(key) % 10000}",
                 scopes=["api_access"],
                 expires_at=None  # API keys don't expire
             )
-        return None
+            for key in self.valid_api_keys
+        }
+    
+    async def verify_token(self, token: str) -> Optional[Any]:
+        """Verify the provided token and return AccessToken compatible with MCP SDK's BearerAuthBackend."""
+        return self._access_tokens.get(token)
 
 
-class InMemoryEventStore:
-    """Simple in-memory event store for demonstration."""
-    
-    def __init__(self):
-        self.events = []
-    
-    async def store_event(self, event_id: str, event_data: dict):
-        """Store an event."""
-        self.events.append({"id": event_id, "data": event_data})
-    
-    async def get_events_since(self, last_event_id: str = None):
-        """Get events since the last event ID."""
-        if last_event_id is None:
-            return self.events
-        
-        # Find the index of the last event ID
-        for i, event in enumerate(self.events):
-            if event["id"] == last_event_id:
-                return self.events[i + 1:]
-        
-        return self.events
+# Tool definitions for the low-level server; static, so built once at import
+_TOOLS: list[types.Tool] = [
+    types.Tool(
+        name="search_hotels_by_location",
+        description="Search for hotels near a specific location with distance information",
+        inputSchema={
+            "type": "object",
+            "required": ["latitude", "longitude"],
+            "properties": {
+                "latitude": {"type": "number", "description": "Latitude coordinate"},
+                "longitude": {"type": "number", "description": "Longitude coordinate"},
+                "radius": {"type": "integer", "description": "Search radius in kilometers"},
+                "radius_unit": {"type": "string", "enum": list(get_args(RadiusUnit)), "description": "Unit for radius (KM or MILE)"},
+                "amenities": {"type": "array", "items": {"type": "string"}, "description": "Desired amenities"},
+                "ratings": {"type": "array", "items": {"type": "string", "enum": list(get_args(StarRating))}, "description": "Hotel star ratings"},
+                "chain_codes": {"type": "array", "items": {"type": "string"}, "description": "Hotel chain codes"},
+                "hotel_source": {"type": "string", "enum": list(get_args(HotelSource)), "description": "Hotel source (BEDBANK, DIRECTCHAIN, ALL)"},
+            },
+        },
+    ),
+    types.Tool(
+        name="search_hotel_offers",
+        description="Search for hotel offers with pricing and availability information",
+        inputSchema={
+            "type": "object",
+            "required": ["hotel_ids", "check_in_date", "check_out_date"],
+            "properties": {
+                "hotel_ids": {"type": "array", "items": {"type": "string"}, "description": "List of Amadeus hotel IDs"},
+                "check_in_date": {"type": "string", "description": "Check-in date (YYYY-MM-DD)"},
+                "check_out_date": {"type": "string", "description": "Check-out date (YYYY-MM-DD)"},
+                "adults": {"type": "integer", "description": "Number of adult guests"},
+                "room_quantity": {"type": "integer", "description": "Number of rooms"},
+                "currency": {"type": "string", "description": "Currency code"},
+                "price_range": {"type": "string", "description": "Price range filter"},
+                "payment_policy": {"type": "string", "enum": list(get_args(PaymentPolicy)), "description": "Payment policy filter"},
+                "board_type": {"type": "string", "enum": list(get_args(BoardType)), "description": "Board type filter"},
+                "include_closed": {"type": "boolean", "description": "Include sold out properties"},
+                "best_rate_only": {"type": "boolean", "description": "Return only best rates"},
+                "lang": {"type": "string", "description": "Language code"},
+            },
+        },
+    ),
+    types.Tool(
+        name="health_check",
+        description="Check the health status of the Amadeus API connection",
+        inputSchema={"type": "object", "properties": {}},
+    ),
+    types.Tool(
+        name="search_hotels_by_multiple_locations",
+        description="Search for hotels near multiple locations concurrently for improved performance",
+        inputSchema={
+            "type": "object",
+            "required": ["locations"],
+            "properties": {
+                "locations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["latitude", "longitude"],
+                        "properties": {
+                            "latitude": {"type": "number", "description": "Latitude coordinate"},
+                            "longitude": {"type": "number", "description": "Longitude coordinate"},
+                        }
+                    },
+                    "description": "List of location objects with latitude and longitude"
+                },
+                "radius": {"type": "integer", "description": "Search radius in kilometers"},
+                "radius_unit": {"type": "string", "enum": list(get_args(RadiusUnit)), "description": "Unit for radius (KM or MILE)"},
+                "amenities": {"type": "array", "items": {"type": "string"}, "description": "Desired amenities"},
+                "ratings": {"type": "array", "items": {"type": "string", "enum": list(get_args(StarRating))}, "description": "Hotel star ratings"},
+                "chain_codes": {"type": "array", "items": {"type": "string"}, "description": "Hotel chain codes"},
+                "hotel_source": {"type": "string", "enum": list(get_args(HotelSource)), "description": "Hotel source (BEDBANK, DIRECTCHAIN, ALL)"},
+            },
+        },
+    ),
+    types.Tool(
+        name="search_hotel_offers_batch",
+        description="Search for hotel offers for multiple requests at once; requests that differ only in hotel IDs share one API call",
+        inputSchema={
+            "type": "object",
+            "required": ["hotel_offer_requests"],
+            "properties": {
+                "hotel_offer_requests": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["hotel_ids", "check_in_date", "check_out_date"],
+                        "properties": {
+                            "hotel_ids": {"type": "array", "items": {"type": "string"}, "description": "List of Amadeus hotel IDs"},
+                            "check_in_date": {"type": "string", "description": "Check-in date (YYYY-MM-DD)"},
+                            "check_out_date": {"type": "string", "description": "Check-out date (YYYY-MM-DD)"},
+                            "adults": {"type": "integer", "description": "Number of adult guests"},
+                            "room_quantity": {"type": "integer", "description": "Number of rooms"},
+                            "currency": {"type": "string", "description": "Currency code"},
+                            "price_range": {"type": "string", "description": "Price range filter"},
+                            "payment_policy": {"type": "string", "enum": list(get_args(PaymentPolicy)), "description": "Payment policy filter"},
+                            "board_type": {"type": "string", "enum": list(get_args(BoardType)), "description": "Board type filter"},
+                            "include_closed": {"type": "boolean", "description": "Include sold out properties"},
+                            "best_rate_only": {"type": "boolean", "description": "Return only best rates"},
+                            "lang": {"type": "string", "description": "Language code"},
+                        }
+                    },
+                    "description": "List of hotel offer request objects"
+                },
+            },
+        },
+    ),
+    types.Tool(
+        name="get_cache_stats",
+        description="Get response and hotel list cache statistics (size, hits, misses, hit rate)",
+        inputSchema={"type": "object", "properties": {}},
+    ),
+    types.Tool(
+        name="clear_cache",
+        description="Clear all cached API responses",
+        inputSchema={"type": "object", "properties": {}},
+    ),
+    # DISABLED: Hotel Booking v2 tool
+    # This tool is implemented but disabled for security and compliance reasons
+    # Uncomment and enable only when proper payment processing and compliance measures are in place
+    #
+    # types.Tool(
+    #     name="book_hotel",
+    #     description="Book a hotel using Hotel Booking v2 API (DISABLED)",
+    #     inputSchema={
+    #         "type": "object",
+    #         "required": ["offer_id", "guests", "room_associations", "payment"],
+    #         "properties": {
+    #             "offer_id": {"type": "string", "description": "Hotel offer ID from search results"},
+    #             "guests": {
+    #                 "type": "array",
+    #                 "items": {"type": "object"},
+    #                 "description": "List of guest information"
+    #             },
+    #             "room_associations": {
+    #                 "type": "array",
+    #                 "items": {"type": "object"},
+    #                 "description": "Room to guest associations"
+    #             },
+    #             "payment": {"type": "object", "description": "Payment information"},
+    #             "travel_agent": {"type": "object", "description": "Optional travel agent information"},
+    #         },
+    #     },
+    # ),
+]
 
 
-def create_mcp_server() -> Server:
+def create_mcp_server(tools: Optional[AmadeusHotelsTools] = None) -> Server:
     """Create and configure the MCP server."""
     settings = get_app_settings()
     
@@ -153,174 +345,135 @@ def create_mcp_server() -> Server:
     app = Server("AmadeusHotelsServer")
     
     # Initialize tools
-    tools = AmadeusHotelsTools()
+    if tools is None:
+        tools = AmadeusHotelsTools()
+    
+    # Tool name -> handler; tools without parameters ignore any arguments sent
+    handlers = {
+        "search_hotels_by_location": tools.search_hotels_by_location,
+        "search_hotel_offers": tools.search_hotel_offers,
+        "health_check": lambda **_: tools.health_check(),
+        "search_hotels_by_multiple_locations": tools.search_hotels_by_multiple_locations,
+        "search_hotel_offers_batch": tools.search_hotel_offers_batch,
+        "get_cache_stats": lambda **_: tools.get_cache_stats(),
+        "clear_cache": lambda **_: tools.clear_cache(),
+        # DISABLED: Hotel Booking v2 tool handler
+        # "book_hotel": tools.book_hotel,
+    }
     
     @app.call_tool()
     async def call_tool(name: str, arguments: dict[str, Any]) -> list[types.ContentBlock]:
         """Handle tool calls."""
+        handler = handlers.get(name)
+        if handler is None:
+            return [types.TextContent(type="text", text=f"Unknown tool: {name}")]
         try:
-            if name == "search_hotels_by_location":
-                result = await tools.search_hotels_by_location(**arguments)
-            elif name == "search_hotel_offers":
-                result = await tools.search_hotel_offers(**arguments)
-            elif name == "health_check":
-                result = await tools.health_check()
-            elif name == "search_hotels_by_multiple_locations":
-                result = await tools.search_hotels_by_multiple_locations(**arguments)
-            elif name == "search_hotel_offers_batch":
-                result = await tools.search_hotel_offers_batch(**arguments)
-            # DISABLED: Hotel Booking v2 tool handler
-            # elif name == "book_hotel":
-            #     result = await tools.book_hotel(**arguments)
-            else:
-                result = f"Unknown tool: {name}"
-            
+            result = await handler(**arguments)
             return [types.TextContent(type="text", text=result)]
         except Exception as e:
-            logger.error(f"Error executing tool {name}: {e}")
+            logger.error("Error executing tool %s: %s", name, e)
             return [types.TextContent(type="text", text=f"Error: {str(e)}")]
     
     @app.list_tools()
     async def list_tools() -> list[types.Tool]:
         """List available tools."""
-        return [
-            types.Tool(
-                name="search_hotels_by_location",
-                description="Search for hotels near a specific location with distance information",
-                inputSchema={
-                    "type": "object",
-                    "required": ["latitude", "longitude"],
-                    "properties": {
-                        "latitude": {"type": "number", "description": "Latitude coordinate"},
-                        "longitude": {"type": "number", "description": "Longitude coordinate"},
-                        "radius": {"type": "integer", "description": "Search radius in kilometers"},
-                        "radius_unit": {"type": "string", "description": "Unit for radius (KM or MILE)"},
-                        "amenities": {"type": "array", "items": {"type": "string"}, "description": "Desired amenities"},
-                        "ratings": {"type": "array", "items": {"type": "string"}, "description": "Hotel star ratings"},
-                        "chain_codes": {"type": "array", "items": {"type": "string"}, "description": "Hotel chain codes"},
-                        "hotel_source": {"type": "string", "description": "Hotel source (BEDBANK, DIRECTCHAIN, ALL)"},
-                    },
-                },
-            ),
-            types.Tool(
-                name="search_hotel_offers",
-                description="Search for hotel offers with pricing and availability information",
-                inputSchema={
-                    "type": "object",
-                    "required": ["hotel_ids", "check_in_date", "check_out_date"],
-                    "properties": {
-                        "hotel_ids": {"type": "array", "items": {"type": "string"}, "description": "List of Amadeus hotel IDs"},
-                        "check_in_date": {"type": "string", "description": "Check-in date (YYYY-MM-DD)"},
-                        "check_out_date": {"type": "string", "description": "Check-out date (YYYY-MM-DD)"},
-                        "adults": {"type": "integer", "description": "Number of adult guests"},
-                        "room_quantity": {"type": "integer", "description": "Number of rooms"},
-                        "currency": {"type": "string", "description": "Currency code"},
-                        "price_range": {"type": "string", "description": "Price range filter"},
-                        "payment_policy": {"type": "string", "description": "Payment policy filter"},
-                        "board_type": {"type": "string", "description": "Board type filter"},
-                        "include_closed": {"type": "boolean", "description": "Include sold out properties"},
-                        "best_rate_only": {"type": "boolean", "description": "Return only best rates"},
-                        "lang": {"type": "string", "description": "Language code"},
-                    },
-                },
-            ),
-            types.Tool(
-                name="health_check",
-                description="Check the health status of the Amadeus API connection",
-                inputSchema={"type": "object", "properties": {}},
-            ),
-            types.Tool(
-                name="search_hotels_by_multiple_locations",
-                description="Search for hotels near multiple locations concurrently for improved performance",
-                inputSchema={
-                    "type": "object",
-                    "required": ["locations"],
-                    "properties": {
-                        "locations": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "required": ["latitude", "longitude"],
-                                "properties": {
-                                    "latitude": {"type": "number", "description": "Latitude coordinate"},
-                                    "longitude": {"type": "number", "description": "Longitude coordinate"},
-                                }
-                            },
-                            "description": "List of location objects with latitude and longitude"
-                        },
-                        "radius": {"type": "integer", "description": "Search radius in kilometers"},
-                        "radius_unit": {"type": "string", "description": "Unit for radius (KM or MILE)"},
-                        "amenities": {"type": "array", "items": {"type": "string"}, "description": "Desired amenities"},
-                        "ratings": {"type": "array", "items": {"type": "string"}, "description": "Hotel star ratings"},
-                        "chain_codes": {"type": "array", "items": {"type": "string"}, "description": "Hotel chain codes"},
-                        "hotel_source": {"type": "string", "description": "Hotel source (BEDBANK, DIRECTCHAIN, ALL)"},
-                    },
-                },
-            ),
-            types.Tool(
-                name="search_hotel_offers_batch",
-                description="Search for hotel offers for multiple requests concurrently for improved performance",
-                inputSchema={
-                    "type": "object",
-                    "required": ["hotel_offer_requests"],
-                    "properties": {
-                        "hotel_offer_requests": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "required": ["hotel_ids", "check_in_date", "check_out_date"],
-                                "properties": {
-                                    "hotel_ids": {"type": "array", "items": {"type": "string"}, "description": "List of Amadeus hotel IDs"},
-                                    "check_in_date": {"type": "string", "description": "Check-in date (YYYY-MM-DD)"},
-                                    "check_out_date": {"type": "string", "description": "Check-out date (YYYY-MM-DD)"},
-                                    "adults": {"type": "integer", "description": "Number of adult guests"},
-                                    "room_quantity": {"type": "integer", "description": "Number of rooms"},
-                                    "currency": {"type": "string", "description": "Currency code"},
-                                    "price_range": {"type": "string", "description": "Price range filter"},
-                                    "payment_policy": {"type": "string", "description": "Payment policy filter"},
-                                    "board_type": {"type": "string", "description": "Board type filter"},
-                                    "include_closed": {"type": "boolean", "description": "Include sold out properties"},
-                                    "best_rate_only": {"type": "boolean", "description": "Return only best rates"},
-                                    "lang": {"type": "string", "description": "Language code"},
-                                }
-                            },
-                            "description": "List of hotel offer request objects"
-                        },
-                    },
-                },
-            ),
-            # DISABLED: Hotel Booking v2 tool
-            # This tool is implemented but disabled for security and compliance reasons
-            # Uncomment and enable only when proper payment processing and compliance measures are in place
-            #
-            # types.Tool(
-            #     name="book_hotel",
-            #     description="Book a hotel using Hotel Booking v2 API (DISABLED)",
-            #     inputSchema={
-            #         "type": "object",
-            #         "required": ["offer_id", "guests", "room_associations", "payment"],
-            #         "properties": {
-            #             "offer_id": {"type": "string", "description": "Hotel offer ID from search results"},
-            #             "guests": {
-            #                 "type": "array",
-            #                 "items": {"type": "object"},
-            #                 "description": "List of guest information"
-            #             },
-            #             "room_associations": {
-            #                 "type": "array",
-            #                 "items": {"type": "object"},
-            #                 "description": "Room to guest associations"
-            #             },
-            #             "payment": {"type": "object", "description": "Payment information"},
-            #             "travel_agent": {"type": "object", "description": "Optional travel agent information"},
-            #         },
-            #     },
-            # ),
-        ]
+        return _TOOLS
     
     return app
 
 
+def build_asgi_app(json_response: Optional[bool] = None) -> ASGIApp:
+    """Build the streamable HTTP ASGI application.
+    
+    This is the factory process managers load in each worker: ``main()``
+    passes it to uvicorn when ``--workers`` is above 1, and Gunicorn loads it
+    with ``gunicorn -c gunicorn.conf.py "src.main:build_asgi_app()"``.
+    """
+    settings = get_app_settings()
+    # Worker processes don't run main(); make sure their logging is set up
+    setup_logging(settings.log_level)
+    if json_response is None:
+        json_response = settings.json_response
+    
+    # Create low-level MCP server; the tools are shared by every session
+    tools = AmadeusHotelsTools()
+    app = create_mcp_server(tools)
+    
+    # Create event store for resumability
+    if settings.redis_url:
+        event_store: EventStore = RedisEventStore(
+            settings.redis_url,
+            max_events_per_stream=settings.event_store_max_events,
+            ttl=settings.event_store_ttl,
+        )
+        logger.info("Storing resumability events in Redis")
+    else:
+        event_store = InMemoryEventStore(max_events_per_stream=settings.event_store_max_events)
+    
+    # Create the session manager with our app and event store
+    session_manager = StreamableHTTPSessionManager(
+        app=app,
+        event_store=event_store,  # Enable resumability
+        json_response=json_response,
+        # Sessions live in process memory; workers that don't share them must be stateless
+        stateless=settings.stateless_http,
+    )
+    
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        """Context manager for managing session manager lifecycle."""
+        if settings.warm_up_on_startup:
+            # Fail fast on rejected credentials and have a token ready
+            await tools.startup()
+        if settings.token_refresh_in_background:
+            tools.start_token_refresh()
+        async with session_manager.run():
+            logger.info("Application started with StreamableHTTP session manager!")
+            try:
+                yield
+            finally:
+                logger.info("Application shutting down...")
+                await close_amadeus_client()
+                if isinstance(event_store, RedisEventStore):
+                    await event_store.aclose()
+    
+    # Create an ASGI application using the transport
+    starlette_app = Starlette(
+        debug=True,
+        routes=[
+            # CORS preflights are answered by the CORSMiddleware wrapping the app
+            Mount("/mcp", app=session_manager.handle_request),
+        ],
+        lifespan=lifespan,
+    )
+    
+    # Apply authentication middleware using SDK's BearerAuthBackend if enabled
+    if settings.auth_enabled:
+        token_verifier = SimpleTokenVerifier(settings.api_keys)
+        auth_backend = BearerAuthBackend(token_verifier=token_verifier)
+        
+        # Use conditional auth middleware that uses SDK's BearerAuthBackend
+        starlette_app.add_middleware(
+            ConditionalAuthMiddleware,
+            auth_backend=auth_backend
+        )
+        logger.info("Authentication middleware enabled with %d API keys using MCP SDK BearerAuthBackend", len(settings.api_keys))
+    else:
+        logger.warning("Authentication is disabled - server is not secure!")
+    
+    # Wrap ASGI application with CORS middleware to expose Mcp-Session-Id header
+    # for browser-based clients (ensures 500 errors get proper CORS headers)
+    starlette_app = CORSMiddleware(
+        starlette_app,
+        allow_origins=["*"],  # Allow all origins - adjust as needed for production
+        allow_methods=["GET", "POST", "OPTIONS", "DELETE"],  # MCP streamable HTTP methods
+        allow_headers=["*"],
+        expose_headers=["Mcp-Session-Id"],
+    )
+    
+    return starlette_app
+
+
 @click.command()
 @click.option(
     "--port",
@@ -351,6 +504,12 @@ def create_mcp_server() -> Server:
     default=False,
     help="Enable JSON responses instead of SSE streams",
 )
+@click.option(
+    "--workers",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Server processes for the streamable HTTP transport (overrides environment variable)",
+)
 @click.option(
     "--disable-auth",
     is_flag=True,
@@ -363,6 +522,7 @@ def main(
     log_level: Optional[str],
     transport: str,
     json_response: bool,
+    workers: Optional[int],
     disable_auth: bool,
 ) -> None:
     """Run the Amadeus Hotels MCP server."""
@@ -377,114 +537,89 @@ def main(
             settings.host = host
         if log_level is not None:
             settings.log_level = log_level
+        if json_response:
+            settings.json_response = True
+        if workers is not None:
+            settings.workers = workers
         if disable_auth:
             settings.auth_enabled = False
         
         # Setup logging
         setup_logging(settings.log_level)
         
-        logger.info(f"Starting Amadeus Hotels MCP server on {settings.host}:{settings.port}")
-        logger.info(f"Using transport: {transport}")
-        logger.info(f"Amadeus API base URL: {settings.amadeus_base_url}")
-        logger.info(f"Authentication enabled: {settings.auth_enabled}")
+        if install_uvloop():
+            logger.info("Using uvloop event loop")
+        
+        logger.info("Starting Amadeus Hotels MCP server on %s:%s", settings.host, settings.port)
+        logger.info("Using transport: %s", transport)
+        logger.info("Amadeus API base URL: %s", settings.amadeus_base_url)
+        logger.info("Authentication enabled: %s", settings.auth_enabled)
         if settings.auth_enabled:
-            logger.info(f"Number of configured API keys: {len(settings.api_keys)}")
+            logger.info("Number of configured API keys: %d", len(settings.api_keys))
         
         if transport == "stdio":
             logger.info("Running with stdio transport")
             # Create FastMCP server for stdio
             from mcp.server.fastmcp import FastMCP
-            mcp = FastMCP("AmadeusHotelsServer")
+            
+            @contextlib.asynccontextmanager
+            async def stdio_lifespan(server: FastMCP) -> AsyncIterator[None]:
+                """Close the shared Amadeus HTTP session when the stdio session ends."""
+                try:
+                    yield
+                finally:
+                    await close_amadeus_client()
+            
+            mcp = FastMCP("AmadeusHotelsServer", lifespan=stdio_lifespan)
             tools = AmadeusHotelsTools()
             tools.register_tools(mcp)
             mcp.run(transport="stdio")
         else:
-            logger.info(f"Running with streamable-http transport on {settings.host}:{settings.port}")
-            
-            # Create low-level MCP server
-            app = create_mcp_server()
+            logger.info("Running with streamable-http transport on %s:%s", settings.host, settings.port)
+            raise_open_file_limit()
             
-            # Create event store for resumability
-            event_store = InMemoryEventStore()
+            # httptools ships with uvicorn[standard]; its C parser is much cheaper
+            # than h11 for the many small JSON-RPC requests MCP clients send.
+            # Uvicorn's own loggers propagate to the queued root handler, and
+            # per-request access lines are skipped.
+            server_options: Dict[str, Any] = {
+                "host": settings.host,
+                "port": settings.port,
+                "http": "httptools",
+                "access_log": False,
+                "log_config": None,
+                "limit_concurrency": settings.http_limit_concurrency or None,
+                "backlog": settings.http_backlog,
+                "timeout_keep_alive": settings.http_keep_alive_timeout,
+            }
             
-            # Create the session manager with our app and event store
-            session_manager = StreamableHTTPSessionManager(
-                app=app,
-                event_store=event_store,  # Enable resumability
-                json_response=json_response,
-            )
-            
-            # ASGI handler for streamable HTTP connections
-            async def handle_streamable_http(scope: Scope, receive: Receive, send: Send) -> None:
-                # Handle OPTIONS requests for CORS preflight
-                if scope["method"] == "OPTIONS":
-                    headers = [
-                        (b"access-control-allow-origin", b"*"),
-                        (b"access-control-allow-methods", b"GET, POST, OPTIONS, DELETE"),
-                        (b"access-control-allow-headers", b"*"),
-                        (b"access-control-expose-headers", b"Mcp-Session-Id"),
-                        (b"content-length", b"0"),
-                    ]
-                    await send({
-                        "type": "http.response.start",
-                        "status": 200,
-                        "headers": headers,
-                    })
-                    await send({"type": "http.response.body", "body": b""})
-                    return
-                
-                await session_manager.handle_request(scope, receive, send)
-            
-            @contextlib.asynccontextmanager
-            async def lifespan(app: Starlette) -> AsyncIterator[None]:
-                """Context manager for managing session manager lifecycle."""
-                async with session_manager.run():
-                    logger.info("Application started with StreamableHTTP session manager!")
-                    try:
-                        yield
-                    finally:
-                        logger.info("Application shutting down...")
-            
-            # Create an ASGI application using the transport
-            starlette_app = Starlette(
-                debug=True,
-                routes=[
-                    Mount("/mcp", app=handle_streamable_http),
-                ],
-                lifespan=lifespan,
-            )
-            
-            # Apply authentication middleware using SDK's BearerAuthBackend if enabled
-            if settings.auth_enabled:
-                token_verifier = SimpleTokenVerifier(settings.api_keys)
-                auth_backend = BearerAuthBackend(token_verifier=token_verifier)
-                
-                # Use conditional auth middleware that uses SDK's BearerAuthBackend
-                starlette_app.add_middleware(
-                    ConditionalAuthMiddleware,
-                    auth_backend=auth_backend
+            if settings.workers > 1:
+                if not settings.stateless_http:
+                    logger.warning(
+                        "Sessions are not shared between workers; set STATELESS_HTTP=true "
+                        "unless clients are pinned to one worker"
+                    )
+                # Worker processes load their settings from the environment,
+                # so hand them the command line overrides that way
+                os.environ.update({
+                    "LOG_LEVEL": settings.log_level,
+                    "AUTH_ENABLED": str(settings.auth_enabled).lower(),
+                    "JSON_RESPONSE": str(settings.json_response).lower(),
+                })
+                uvicorn.run(
+                    "src.main:build_asgi_app",
+                    factory=True,
+                    workers=settings.workers,
+                    **server_options,
                 )
-                logger.info(f"Authentication middleware enabled with {len(settings.api_keys)} API keys using MCP SDK BearerAuthBackend")
             else:
-                logger.warning("Authentication is disabled - server is not secure!")
-            
-            # Wrap ASGI application with CORS middleware to expose Mcp-Session-Id header
-            # for browser-based clients (ensures 500 errors get proper CORS headers)
-            starlette_app = CORSMiddleware(
-                starlette_app,
-                allow_origins=["*"],  # Allow all origins - adjust as needed for production
-                allow_methods=["GET", "POST", "OPTIONS", "DELETE"],  # MCP streamable HTTP methods
-                allow_headers=["*"],
-                expose_headers=["Mcp-Session-Id"],
-            )
-            
-            uvicorn.run(starlette_app, host=settings.host, port=settings.port)
+                uvicorn.run(build_asgi_app(), **server_options)
             
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
         sys.exit(0)
     except Exception as e:
-        logger.error(f"Failed to start server: {e}")
+        logger.error("Failed to start server: %s", e)
         sys.exit(1)
 
 
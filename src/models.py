@@ -3,8 +3,18 @@ Pydantic models for Amadeus Hotels API requests and responses.
 """
 
 from datetime import date
-from typing import Any, Dict, List, Optional, Union
-from pydantic import BaseModel, Field, validator
+from functools import cached_property
+from typing import Any, Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
+
+
+# Values accepted by the API's enumerated request parameters; the tool
+# signatures use the same types so their schemas list them too
+RadiusUnit = Literal['KM', 'MILE']
+StarRating = Literal['1', '2', '3', '4', '5']
+HotelSource = Literal['BEDBANK', 'DIRECTCHAIN', 'ALL']
+PaymentPolicy = Literal['GUARANTEE', 'DEPOSIT', 'NONE']
+BoardType = Literal['ROOM_ONLY', 'BREAKFAST', 'HALF_BOARD', 'FULL_BOARD', 'ALL_INCLUSIVE']
 
 
 class GeoCode(BaseModel):
@@ -47,32 +57,36 @@ class HotelsListRequest(BaseModel):
     latitude: float = Field(..., description="Latitude of search point")
     longitude: float = Field(..., description="Longitude of search point")
     radius: Optional[int] = Field(5, description="Search radius in specified units")
-    radius_unit: Optional[str] = Field("KM", description="Unit for radius (KM or MILE)")
+    radius_unit: RadiusUnit = Field("KM", description="Unit for radius (KM or MILE)")
     chain_codes: Optional[List[str]] = Field(None, description="Hotel chain codes")
     amenities: Optional[List[str]] = Field(None, description="Desired amenities")
-    ratings: Optional[List[str]] = Field(None, description="Hotel star ratings")
-    hotel_source: Optional[str] = Field("ALL", description="Hotel source (BEDBANK, DIRECTCHAIN, ALL)")
-
-    @validator('radius_unit')
-    def validate_radius_unit(cls, v):
-        if v not in ['KM', 'MILE']:
-            raise ValueError('radius_unit must be either KM or MILE')
-        return v
-
-    @validator('hotel_source')
-    def validate_hotel_source(cls, v):
-        if v not in ['BEDBANK', 'DIRECTCHAIN', 'ALL']:
-            raise ValueError('hotel_source must be BEDBANK, DIRECTCHAIN, or ALL')
-        return v
-
-    @validator('ratings')
-    def validate_ratings(cls, v):
-        if v:
-            valid_ratings = ['1', '2', '3', '4', '5']
-            for rating in v:
-                if rating not in valid_ratings:
-                    raise ValueError(f'Rating must be one of {valid_ratings}')
-        return v
+    ratings: Optional[List[StarRating]] = Field(None, description="Hotel star ratings")
+    hotel_source: HotelSource = Field("ALL", description="Hotel source (BEDBANK, DIRECTCHAIN, ALL)")
+
+    @cached_property
+    def as_params(self) -> Dict[str, Any]:
+        """Query parameters for the hotels by-geocode API, built once per request.
+
+        The dict is shared between calls (retries, batch paths); copy it before
+        modifying.
+        """
+        params: Dict[str, Any] = {
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "radius": self.radius,
+            "radiusUnit": self.radius_unit,
+        }
+
+        # Add optional parameters
+        if self.chain_codes:
+            params["chainCodes"] = ",".join(self.chain_codes)
+        if self.amenities:
+            params["amenities"] = ",".join(self.amenities)
+        if self.ratings:
+            params["ratings"] = ",".join(self.ratings)
+        if self.hotel_source:
+            params["hotelSource"] = self.hotel_source
+        return params
 
 
 class RoomTypeEstimated(BaseModel):
@@ -173,30 +187,54 @@ class HotelOffersRequest(BaseModel):
     room_quantity: Optional[int] = Field(1, description="Number of rooms")
     currency: Optional[str] = Field(None, description="Currency code")
     price_range: Optional[str] = Field(None, description="Price range filter")
-    payment_policy: Optional[str] = Field("NONE", description="Payment policy filter")
-    board_type: Optional[str] = Field(None, description="Board type filter")
+    payment_policy: PaymentPolicy = Field("NONE", description="Payment policy filter")
+    board_type: Optional[BoardType] = Field(None, description="Board type filter")
     include_closed: Optional[bool] = Field(False, description="Include sold out properties")
     best_rate_only: Optional[bool] = Field(True, description="Return only best rates")
     lang: Optional[str] = Field(None, description="Language code")
 
-    @validator('payment_policy')
-    def validate_payment_policy(cls, v):
-        if v not in ['GUARANTEE', 'DEPOSIT', 'NONE']:
-            raise ValueError('payment_policy must be GUARANTEE, DEPOSIT, or NONE')
-        return v
-
-    @validator('board_type')
-    def validate_board_type(cls, v):
-        if v and v not in ['ROOM_ONLY', 'BREAKFAST', 'HALF_BOARD', 'FULL_BOARD', 'ALL_INCLUSIVE']:
-            raise ValueError('board_type must be one of: ROOM_ONLY, BREAKFAST, HALF_BOARD, FULL_BOARD, ALL_INCLUSIVE')
-        return v
+    @field_validator('board_type', mode='before')
+    @classmethod
+    def empty_board_type_means_any(cls, v):
+        # An empty board type has always meant "no filter"
+        return v or None
 
-    @validator('check_out_date')
-    def validate_check_out_date(cls, v, values):
-        if 'check_in_date' in values and v <= values['check_in_date']:
+    @field_validator('check_out_date')
+    @classmethod
+    def validate_check_out_date(cls, v, info: ValidationInfo):
+        if 'check_in_date' in info.data and v <= info.data['check_in_date']:
             raise ValueError('check_out_date must be after check_in_date')
         return v
 
+    @cached_property
+    def as_params(self) -> Dict[str, Any]:
+        """Query parameters for the hotel offers API, built once per request.
+
+        The dict is shared between calls (retries, batch paths); copy it before
+        modifying.
+        """
+        params: Dict[str, Any] = {
+            "hotelIds": ",".join(self.hotel_ids),
+            "adults": self.adults,
+            "checkInDate": self.check_in_date.isoformat(),
+            "checkOutDate": self.check_out_date.isoformat(),
+            "roomQuantity": self.room_quantity,
+            "paymentPolicy": self.payment_policy,
+            "bestRateOnly": self.best_rate_only,
+            "includeClosed": self.include_closed,
+        }
+
+        # Add optional parameters
+        if self.currency:
+            params["currency"] = self.currency
+        if self.price_range:
+            params["priceRange"] = self.price_range
+        if self.board_type:
+            params["boardType"] = self.board_type
+        if self.lang:
+            params["lang"] = self.lang
+        return params
+
 
 class AmadeusError(BaseModel):
     """Amadeus API error response."""
@@ -214,15 +252,21 @@ class AmadeusErrorResponse(BaseModel):
 
 
 # Hotel Booking v2 Models (DISABLED - for future implementation)
+# Their validators are built on first use, so the disabled booking path
+# adds nothing to startup.
 
 class GuestContact(BaseModel):
     """Guest contact information."""
+    model_config = ConfigDict(defer_build=True)
+
     phone: Optional[str] = Field(None, description="Phone number")
     email: Optional[str] = Field(None, description="Email address")
 
 
 class GuestName(BaseModel):
     """Guest name information."""
+    model_config = ConfigDict(defer_build=True)
+
     title: Optional[str] = Field(None, description="Title (Mr, Mrs, etc.)")
     first_name: str = Field(..., alias="firstName", description="First name")
     last_name: str = Field(..., alias="lastName", description="Last name")
@@ -230,24 +274,32 @@ class GuestName(BaseModel):
 
 class Guest(BaseModel):
     """Guest information for booking."""
+    model_config = ConfigDict(defer_build=True)
+
     contact: Optional[GuestContact] = Field(None, description="Contact information")
     name: GuestName = Field(..., description="Guest name")
 
 
 class TravelAgent(BaseModel):
     """Travel agent information."""
+    model_config = ConfigDict(defer_build=True)
+
     name: Optional[str] = Field(None, description="Travel agent name")
     code: Optional[str] = Field(None, description="Travel agent code")
 
 
 class RoomAssociation(BaseModel):
     """Room association for booking."""
+    model_config = ConfigDict(defer_build=True)
+
     room_id: str = Field(..., alias="roomId", description="Room ID")
     guest_ids: List[str] = Field(..., alias="guestIds", description="Guest IDs")
 
 
 class PaymentCard(BaseModel):
     """Payment card information."""
+    model_config = ConfigDict(defer_build=True)
+
     vendor_code: str = Field(..., alias="vendorCode", description="Card vendor code")
     card_number: str = Field(..., alias="cardNumber", description="Card number")
     expiry_date: str = Field(..., alias="expiryDate", description="Expiry date (MM/YY)")
@@ -255,12 +307,16 @@ class PaymentCard(BaseModel):
 
 class Payment(BaseModel):
     """Payment information."""
+    model_config = ConfigDict(defer_build=True)
+
     method: str = Field(..., description="Payment method")
     card: Optional[PaymentCard] = Field(None, description="Card information")
 
 
 class HotelBookingRequest(BaseModel):
     """Request for hotel booking."""
+    model_config = ConfigDict(defer_build=True)
+
     offer_id: str = Field(..., alias="offerId", description="Hotel offer ID")
     guests: List[Guest] = Field(..., description="List of guests")
     travel_agent: Optional[TravelAgent] = Field(None, alias="travelAgent", description="Travel agent info")
@@ -270,4 +326,6 @@ class HotelBookingRequest(BaseModel):
 
 class HotelBookingResponse(BaseModel):
     """Response from hotel booking API."""
+    model_config = ConfigDict(defer_build=True)
+
     data: Dict[str, Any] = Field(..., description="Booking response data")
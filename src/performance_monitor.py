@@ -79,14 +79,14 @@ class PerformanceMonitor:
             self._active_operations[operation_id] = metric
             self._operation_counts[operation_name] += 1
         
-        logger.debug(f"Started operation {operation_id} ({operation_name})")
+        logger.debug("Started operation %s (%s)", operation_id, operation_name)
         return operation_id
     
     def end_operation(self, operation_id: str, success: bool = True, error_message: Optional[str] = None):
         """End tracking an operation."""
         with self._lock:
             if operation_id not in self._active_operations:
-                logger.warning(f"Operation {operation_id} not found in active operations")
+                logger.warning("Operation %s not found in active operations", operation_id)
                 return
             
             metric = self._active_operations[operation_id]
@@ -106,7 +106,7 @@ class PerformanceMonitor:
         
         duration = metric.duration
         status = "success" if success else "failed"
-        logger.debug(f"Completed operation {operation_id} ({metric.operation_name}) in {duration:.3f}s - {status}")
+        logger.debug("Completed operation %s (%s) in %.3fs - %s", operation_id, metric.operation_name, duration, status)
     
     def get_active_operations(self) -> Dict[str, OperationMetrics]:
         """Get currently active operations."""
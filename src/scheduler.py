@@ -0,0 +1,238 @@
+"""
+Admission control for outbound Amadeus API requests: priorities, rate
+limiting and micro-batching.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+
+@dataclass(eq=False)
+class _Waiter:
+    """A caller queued for a request slot."""
+    priority: int
+    sequence: int
+    enqueued_at: float
+    future: asyncio.Future
+
+
+class PrioritySemaphore:
+    """Semaphore that hands free slots to the most urgent waiter.
+
+    Interactive calls (single searches, health checks) are admitted ahead of
+    queued batch sub-requests. To keep batches from starving, a waiter's
+    priority improves by one level for every ``aging_seconds`` it has waited.
+    """
+
+    def __init__(self, value: int, aging_seconds: float = 0.5):
+        if value < 1:
+            raise ValueError("PrioritySemaphore value must be at least 1")
+        self._value = value
+        self.aging_seconds = aging_seconds
+        self._waiters: List[_Waiter] = []
+        self._sequence = itertools.count()
+
+    def _effective_priority(self, waiter: _Waiter, now: float) -> tuple:
+        """Priority after aging; ties are broken by arrival order."""
+        priority: float = waiter.priority
+        if self.aging_seconds > 0:
+            priority -= (now - waiter.enqueued_at) / self.aging_seconds
+        return (priority, waiter.sequence)
+
+    def locked(self) -> bool:
+        """Return True if no slot is immediately available."""
+        return self._value == 0 or bool(self._waiters)
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """Wait for a slot, ahead of any queued waiters with a lower priority."""
+        if not self.locked():
+            self._value -= 1
+            return
+
+        waiter = _Waiter(
+            priority=priority,
+            sequence=next(self._sequence),
+            enqueued_at=time.monotonic(),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                # The slot was handed to us just before cancellation; pass it on
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Hand the slot to the most urgent waiter, or return it to the pool."""
+        now = time.monotonic()
+        while self._waiters:
+            waiter = min(self._waiters, key=lambda w: self._effective_priority(w, now))
+            self._waiters.remove(waiter)
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+                return
+        self._value += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block."""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class AsyncTokenBucket:
+    """Token-bucket rate limiter with AIMD adjustment of the fill rate.
+
+    Every outbound request takes one token. On a rate-limit response the
+    fill rate is halved; after that it climbs back by one request per second
+    for every second without a rate limit, up to the configured ceiling.
+    Tokens are refilled lazily on acquire, so no background task is needed.
+    """
+
+    def __init__(self, rate_per_sec: float, capacity: Optional[float] = None, min_rate: float = 1.0):
+        if rate_per_sec <= 0:
+            raise ValueError("AsyncTokenBucket rate must be positive")
+        self.max_rate = rate_per_sec
+        self.rate = rate_per_sec
+        self.min_rate = min(min_rate, rate_per_sec)
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_sec)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._last_adjusted_at = self._updated_at
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it; waiters are served in order."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def on_rate_limited(self) -> None:
+        """Multiplicative decrease after the server rejected a request."""
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._last_adjusted_at = now
+        logger.warning("Rate limited by upstream; request rate lowered to %.1f/s", self.rate)
+
+    def on_success(self) -> None:
+        """Additive increase, at most one step per second, back up to the ceiling."""
+        if self.rate >= self.max_rate:
+            return
+        now = time.monotonic()
+        if now - self._last_adjusted_at >= 1.0:
+            self._refill(now)
+            self.rate = min(self.max_rate, self.rate + 1)
+            self._last_adjusted_at = now
+
+    async def __aenter__(self) -> "AsyncTokenBucket":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+class MicroBatcher:
+    """Collect calls that arrive within a short window and process them together.
+    
+    Submitted items are grouped by ``key(item)``. A group is flushed
+    ``window`` seconds after its first item arrives, or as soon as it holds
+    ``max_items``. ``flush`` gets the group's items and returns one result per
+    item; an exception in place of a result fails only that item's caller.
+    """
+    
+    def __init__(
+        self,
+        flush: Callable[[List[Any]], Awaitable[List[Any]]],
+        window: float,
+        max_items: int,
+        key: Callable[[Any], Hashable] = lambda item: None,
+    ):
+        self._flush_items = flush
+        self.window = window
+        self.max_items = max_items
+        self._key = key
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        # Running flushes, referenced so they are not garbage collected
+        self._flushing: Set[asyncio.Task] = set()
+    
+    async def submit(self, item: Any) -> Any:
+        """Queue ``item`` for the next flush of its group and wait for its result."""
+        loop = asyncio.get_running_loop()
+        key = self._key(item)
+        future = loop.create_future()
+        
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = []
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+        batch.append((item, future))
+        if len(batch) >= self.max_items:
+            self._flush(key)
+        
+        return await future
+    
+    def _flush(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+    
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        # Skip callers that were cancelled while waiting for the window
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+        
+        try:
+            results = await self._flush_items([item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        except BaseException:
+            for _, future in batch:
+                future.cancel()
+            raise
+        
+        if len(batch) > 1:
+            logger.debug("Processed %d batched calls together", len(batch))
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
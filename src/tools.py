@@ -7,47 +7,50 @@ import logging
 from datetime import date
 from typing import List, Optional, Dict, Any
 
+import orjson
 from mcp.server.fastmcp import FastMCP
 from mcp.types import Tool, TextContent
 
-try:
-    from .amadeus_client import AmadeusClient, AmadeusAPIError, AmadeusAuthenticationError, AmadeusRateLimitError
-    from .models import HotelsListRequest, HotelOffersRequest, HotelBookingRequest
-    from .config import get_app_settings
-    from .cache import AmadeusCache
-    from .performance_monitor import get_performance_monitor, track_operation
-except ImportError:
-    # Handle direct execution
-    from amadeus_client import AmadeusClient, AmadeusAPIError, AmadeusAuthenticationError, AmadeusRateLimitError
-    from models import HotelsListRequest, HotelOffersRequest, HotelBookingRequest
-    from config import get_app_settings
-    from cache import AmadeusCache
-    from performance_monitor import get_performance_monitor, track_operation
+from .amadeus_client import get_amadeus_client, AmadeusAPIError, AmadeusAuthenticationError, AmadeusRateLimitError
+from .models import (
+    BoardType,
+    HotelBookingRequest,
+    HotelOffersRequest,
+    HotelSource,
+    HotelsListRequest,
+    PaymentPolicy,
+    RadiusUnit,
+    StarRating,
+)
+from .config import get_app_settings
+from .cache import AmadeusCache
+from .performance_monitor import get_performance_monitor, track_operation
 
 logger = logging.getLogger(__name__)
 
 
+def _to_json(result: Any) -> str:
+    """Serialize a tool result as indented JSON text."""
+    return orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
+
 class AmadeusHotelsTools:
     """MCP tools for Amadeus Hotels API."""
     
     def __init__(self):
         self.settings = get_app_settings()
-        self.client = AmadeusClient(
-            api_key=self.settings.amadeus_api_key,
-            api_secret=self.settings.amadeus_api_secret,
-            base_url=self.settings.amadeus_base_url,
-            timeout=self.settings.api_timeout,
-            max_retries=self.settings.max_retries,
-            pool_size=self.settings.client_pool_size,
-        )
+        # Share the process-wide client so warm connections and tokens are reused
+        self.client = get_amadeus_client()
         
         # Initialize cache if enabled
         if self.settings.enable_caching:
             self.cache = AmadeusCache(
                 max_size=self.settings.cache_max_size,
-                default_ttl=self.settings.cache_ttl
+                default_ttl=self.settings.cache_ttl,
+                stale_ratio=self.settings.cache_stale_ratio,
+                negative_ttl=self.settings.cache_negative_ttl,
             )
-            logger.info(f"Cache enabled with max_size={self.settings.cache_max_size}, ttl={self.settings.cache_ttl}s")
+            logger.info("Cache enabled with max_size=%s, ttl=%ss", self.settings.cache_max_size, self.settings.cache_ttl)
         else:
             self.cache = None
             logger.info("Cache disabled")
@@ -55,17 +58,25 @@ class AmadeusHotelsTools:
         # Initialize performance monitor
         self.performance_monitor = get_performance_monitor()
     
+    async def startup(self) -> None:
+        """Authenticate with the Amadeus API before the first tool call."""
+        await self.client.warm_up()
+    
+    def start_token_refresh(self) -> None:
+        """Keep the API access token renewed in the background."""
+        self.client.start_token_refresh()
+    
     @track_operation("search_hotels_by_location")
     async def search_hotels_by_location(
         self,
         latitude: float,
         longitude: float,
         radius: Optional[int] = 5,
-        radius_unit: Optional[str] = "KM",
+        radius_unit: RadiusUnit = "KM",
         amenities: Optional[List[str]] = None,
-        ratings: Optional[List[str]] = None,
+        ratings: Optional[List[StarRating]] = None,
         chain_codes: Optional[List[str]] = None,
-        hotel_source: Optional[str] = "ALL",
+        hotel_source: HotelSource = "ALL",
     ) -> str:
         """
         Search for hotels near a specific location with distance information.
@@ -104,8 +115,9 @@ class AmadeusHotelsTools:
                 hotel_source=hotel_source,
             )
             
-            # Make API call (with caching if enabled)
-            if self.cache:
+            # Make API call (with caching if enabled); when the client already
+            # caches hotel lists, a second copy here would only double memory
+            if self.cache and not self.client.geo_cache_enabled:
                 response = await self.cache.get_or_set(
                     "search_hotels_by_location",
                     self.client.search_hotels_by_location,
@@ -143,20 +155,19 @@ class AmadeusHotelsTools:
                 },
             }
             
-            import json
-            return json.dumps(result, indent=2)
+            return _to_json(result)
             
         except AmadeusAuthenticationError as e:
-            logger.error(f"Authentication error: {e}")
+            logger.error("Authentication error: %s", e)
             return f"Error: Authentication failed - {str(e)}"
         except AmadeusRateLimitError as e:
-            logger.error(f"Rate limit error: {e}")
+            logger.error("Rate limit error: %s", e)
             return f"Error: Rate limit exceeded - {str(e)}"
         except AmadeusAPIError as e:
-            logger.error(f"API error: {e}")
+            logger.error("API error: %s", e)
             return f"Error: {str(e)}"
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
+            logger.error("Unexpected error: %s", e)
             return f"Error: Unexpected error occurred - {str(e)}"
 
     async def search_hotel_offers(
@@ -168,8 +179,8 @@ class AmadeusHotelsTools:
         room_quantity: Optional[int] = 1,
         currency: Optional[str] = None,
         price_range: Optional[str] = None,
-        payment_policy: Optional[str] = "NONE",
-        board_type: Optional[str] = None,
+        payment_policy: PaymentPolicy = "NONE",
+        board_type: Optional[BoardType] = None,
         include_closed: Optional[bool] = False,
         best_rate_only: Optional[bool] = True,
         lang: Optional[str] = None,
@@ -299,20 +310,19 @@ class AmadeusHotelsTools:
                 },
             }
             
-            import json
-            return json.dumps(result, indent=2)
+            return _to_json(result)
             
         except AmadeusAuthenticationError as e:
-            logger.error(f"Authentication error: {e}")
+            logger.error("Authentication error: %s", e)
             return f"Error: Authentication failed - {str(e)}"
         except AmadeusRateLimitError as e:
-            logger.error(f"Rate limit error: {e}")
+            logger.error("Rate limit error: %s", e)
             return f"Error: Rate limit exceeded - {str(e)}"
         except AmadeusAPIError as e:
-            logger.error(f"API error: {e}")
+            logger.error("API error: %s", e)
             return f"Error: {str(e)}"
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
+            logger.error("Unexpected error: %s", e)
             return f"Error: Unexpected error occurred - {str(e)}"
 
     async def health_check(self) -> str:
@@ -329,18 +339,18 @@ class AmadeusHotelsTools:
             else:
                 return "❌ Amadeus API is not accessible or authentication failed"
         except Exception as e:
-            logger.error(f"Health check error: {e}")
+            logger.error("Health check error: %s", e)
             return f"❌ Health check failed: {str(e)}"
     
     async def search_hotels_by_multiple_locations(
         self,
         locations: List[Dict[str, Any]],
         radius: Optional[int] = 5,
-        radius_unit: Optional[str] = "KM",
+        radius_unit: RadiusUnit = "KM",
         amenities: Optional[List[str]] = None,
-        ratings: Optional[List[str]] = None,
+        ratings: Optional[List[StarRating]] = None,
         chain_codes: Optional[List[str]] = None,
-        hotel_source: Optional[str] = "ALL",
+        hotel_source: HotelSource = "ALL",
     ) -> str:
         """
         Search for hotels near multiple locations concurrently.
@@ -433,20 +443,19 @@ class AmadeusHotelsTools:
                 },
             }
             
-            import json
-            return json.dumps(result, indent=2)
+            return _to_json(result)
             
         except AmadeusAuthenticationError as e:
-            logger.error(f"Authentication error: {e}")
+            logger.error("Authentication error: %s", e)
             return f"Error: Authentication failed - {str(e)}"
         except AmadeusRateLimitError as e:
-            logger.error(f"Rate limit error: {e}")
+            logger.error("Rate limit error: %s", e)
             return f"Error: Rate limit exceeded - {str(e)}"
         except AmadeusAPIError as e:
-            logger.error(f"API error: {e}")
+            logger.error("API error: %s", e)
             return f"Error: {str(e)}"
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
+            logger.error("Unexpected error: %s", e)
             return f"Error: Unexpected error occurred - {str(e)}"
     
     async def search_hotel_offers_batch(
@@ -567,20 +576,19 @@ class AmadeusHotelsTools:
                 "requests_processed": len(hotel_offer_requests),
             }
             
-            import json
-            return json.dumps(result, indent=2)
+            return _to_json(result)
             
         except AmadeusAuthenticationError as e:
-            logger.error(f"Authentication error: {e}")
+            logger.error("Authentication error: %s", e)
             return f"Error: Authentication failed - {str(e)}"
         except AmadeusRateLimitError as e:
-            logger.error(f"Rate limit error: {e}")
+            logger.error("Rate limit error: %s", e)
             return f"Error: Rate limit exceeded - {str(e)}"
         except AmadeusAPIError as e:
-            logger.error(f"API error: {e}")
+            logger.error("API error: %s", e)
             return f"Error: {str(e)}"
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
+            logger.error("Unexpected error: %s", e)
             return f"Error: Unexpected error occurred - {str(e)}"
     
     async def get_cache_stats(self) -> str:
@@ -591,27 +599,29 @@ class AmadeusHotelsTools:
             JSON string containing cache statistics
         """
         try:
-            if not self.cache:
+            # Hotel list results are cached inside the API client, separately
+            # from the tools' response cache
+            hotel_list_stats = self.client.geo_cache_stats()
+            if not self.cache and hotel_list_stats is None:
                 return "Cache is disabled"
             
-            stats = self.cache.stats()
-            
-            result = {
-                "cache_enabled": True,
-                "statistics": stats,
-                "performance_metrics": {
+            result: Dict[str, Any] = {"cache_enabled": self.cache is not None}
+            if self.cache:
+                stats = self.cache.stats()
+                result["statistics"] = stats
+                result["performance_metrics"] = {
                     "hit_rate_percentage": round(stats['hit_rate'] * 100, 2),
                     "total_requests": stats['total_requests'],
                     "cache_hits": stats['hit_count'],
                     "cache_misses": stats['miss_count'],
                 }
-            }
+            if hotel_list_stats is not None:
+                result["hotel_list_cache"] = hotel_list_stats
             
-            import json
-            return json.dumps(result, indent=2)
+            return _to_json(result)
             
         except Exception as e:
-            logger.error(f"Error getting cache stats: {e}")
+            logger.error("Error getting cache stats: %s", e)
             return f"Error: {str(e)}"
     
     async def clear_cache(self) -> str:
@@ -622,14 +632,17 @@ class AmadeusHotelsTools:
             Status message
         """
         try:
+            # Hotel list results are also cached inside the API client
+            self.client.clear_geo_cache()
+            
             if not self.cache:
-                return "Cache is disabled"
+                return "✅ Hotel location cache cleared (response cache is disabled)"
             
             self.cache.clear()
             return "✅ Cache cleared successfully"
             
         except Exception as e:
-            logger.error(f"Error clearing cache: {e}")
+            logger.error("Error clearing cache: %s", e)
             return f"Error: {str(e)}"
     
     async def get_performance_stats(self) -> str:
@@ -651,11 +664,10 @@ class AmadeusHotelsTools:
                 "cache_enabled": self.settings.enable_caching,
             }
             
-            import json
-            return json.dumps(result, indent=2)
+            return _to_json(result)
             
         except Exception as e:
-            logger.error(f"Error getting performance stats: {e}")
+            logger.error("Error getting performance stats: %s", e)
             return f"Error: {str(e)}"
     
     # DISABLED: Hotel Booking v2 functionality
@@ -713,20 +725,19 @@ class AmadeusHotelsTools:
     #             "message": "Hotel booking completed successfully"
     #         }
     #         
-    #         import json
-    #         return json.dumps(result, indent=2)
+    #         return _to_json(result)
     #         
     #     except AmadeusAuthenticationError as e:
-    #         logger.error(f"Authentication error: {e}")
+    #         logger.error("Authentication error: %s", e)
     #         return f"Error: Authentication failed - {str(e)}"
     #     except AmadeusRateLimitError as e:
-    #         logger.error(f"Rate limit error: {e}")
+    #         logger.error("Rate limit error: %s", e)
     #         return f"Error: Rate limit exceeded - {str(e)}"
     #     except AmadeusAPIError as e:
-    #         logger.error(f"API error: {e}")
+    #         logger.error("API error: %s", e)
     #         return f"Error: {str(e)}"
     #     except Exception as e:
-    #         logger.error(f"Unexpected error: {e}")
+    #         logger.error("Unexpected error: %s", e)
     #         return f"Error: Unexpected error occurred - {str(e)}"
     
     def register_tools(self, mcp: FastMCP) -> None:
@@ -737,11 +748,11 @@ class AmadeusHotelsTools:
             latitude: float,
             longitude: float,
             radius: Optional[int] = 5,
-            radius_unit: Optional[str] = "KM",
+            radius_unit: RadiusUnit = "KM",
             amenities: Optional[List[str]] = None,
-            ratings: Optional[List[str]] = None,
+            ratings: Optional[List[StarRating]] = None,
             chain_codes: Optional[List[str]] = None,
-            hotel_source: Optional[str] = "ALL",
+            hotel_source: HotelSource = "ALL",
         ) -> str:
             """
             Search for hotels near a specific location with distance information.
@@ -779,8 +790,8 @@ class AmadeusHotelsTools:
             room_quantity: Optional[int] = 1,
             currency: Optional[str] = None,
             price_range: Optional[str] = None,
-            payment_policy: Optional[str] = "NONE",
-            board_type: Optional[str] = None,
+            payment_policy: PaymentPolicy = "NONE",
+            board_type: Optional[BoardType] = None,
             include_closed: Optional[bool] = False,
             best_rate_only: Optional[bool] = True,
             lang: Optional[str] = None,
@@ -830,6 +841,81 @@ class AmadeusHotelsTools:
             """
             return await self.health_check()
         
+        @mcp.tool()
+        async def search_hotels_by_multiple_locations(
+            locations: List[Dict[str, Any]],
+            radius: Optional[int] = 5,
+            radius_unit: RadiusUnit = "KM",
+            amenities: Optional[List[str]] = None,
+            ratings: Optional[List[StarRating]] = None,
+            chain_codes: Optional[List[str]] = None,
+            hotel_source: HotelSource = "ALL",
+        ) -> str:
+            """
+            Search for hotels near multiple locations concurrently.
+            
+            Args:
+                locations: List of location objects with 'latitude' and 'longitude' keys
+                radius: Search radius in the specified units (default: 5)
+                radius_unit: Unit for radius - "KM" or "MILE" (default: "KM")
+                amenities: List of desired amenities (e.g., ["SWIMMING_POOL", "SPA", "WIFI"])
+                ratings: Hotel star ratings (1-5)
+                chain_codes: Hotel chain codes (2-character codes)
+                hotel_source: Hotel source - "BEDBANK", "DIRECTCHAIN", or "ALL" (default: "ALL")
+            
+            Returns:
+                JSON string containing hotel information for all locations
+            """
+            return await self.search_hotels_by_multiple_locations(
+                locations=locations,
+                radius=radius,
+                radius_unit=radius_unit,
+                amenities=amenities,
+                ratings=ratings,
+                chain_codes=chain_codes,
+                hotel_source=hotel_source,
+            )
+        
+        @mcp.tool()
+        async def search_hotel_offers_batch(hotel_offer_requests: List[Dict[str, Any]]) -> str:
+            """
+            Search for hotel offers for multiple requests in as few API calls as possible.
+            
+            Requests that differ only in their hotel IDs are combined into a
+            single upstream call, so prefer this over calling search_hotel_offers
+            once per hotel.
+            
+            Args:
+                hotel_offer_requests: List of request objects, each with 'hotel_ids',
+                    'check_in_date' and 'check_out_date' (YYYY-MM-DD) plus any of the
+                    optional search_hotel_offers parameters
+            
+            Returns:
+                JSON string containing hotel offers for all requests
+            """
+            return await self.search_hotel_offers_batch(hotel_offer_requests=hotel_offer_requests)
+        
+        @mcp.tool()
+        async def get_cache_stats() -> str:
+            """
+            Get response cache statistics.
+            
+            Returns:
+                JSON string containing cache size, hits, misses and hit rate,
+                for the response cache and the hotel list cache
+            """
+            return await self.get_cache_stats()
+        
+        @mcp.tool()
+        async def clear_cache() -> str:
+            """
+            Clear all cached API responses.
+            
+            Returns:
+                Status message
+            """
+            return await self.clear_cache()
+        
         # DISABLED: Hotel Booking v2 tool registration
         # This tool is implemented but disabled for security and compliance reasons
         # Uncomment and enable only when proper payment processing and compliance measures are in place
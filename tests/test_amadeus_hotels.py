@@ -4,12 +4,41 @@ Basic tests for the Amadeus Hotels MCP server.
 
 import pytest
 import asyncio
+import inspect
+import json
+import time
+import httpx
 from datetime import date, timedelta
 from unittest.mock import AsyncMock, patch
 
 from src.models import HotelsListRequest, HotelOffersRequest
-from src.amadeus_client import AmadeusClient, AmadeusAPIError
+from src.amadeus_client import AmadeusClient, AmadeusAPIError, AmadeusAuthenticationError, AmadeusRateLimitError, AmadeusTokenCache, get_token_cache
 from src.tools import AmadeusHotelsTools
+from src.cache import AmadeusCache, ThreadSafeCache
+from src.scheduler import AsyncTokenBucket, MicroBatcher, PrioritySemaphore, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+
+
+@pytest.fixture
+def mock_api():
+    """Route a client's requests to an endpoint handler through httpx.MockTransport.
+
+    Token requests are answered with a valid token unless ``handle_token`` is
+    set, so a handler only describes the API behaviour under test.
+    """
+    def install(client, handler, handle_token=False):
+        async def route(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/v1/security/oauth2/token" and not handle_token:
+                return httpx.Response(200, json={"access_token": "abc", "expires_in": 1799})
+            response = handler(request)
+            if inspect.isawaitable(response):
+                response = await response
+            return response
+
+        client._http = httpx.AsyncClient(
+            base_url=client.base_url, transport=httpx.MockTransport(route)
+        )
+
+    return install
 
 
 class TestAmadeusClient:
@@ -95,6 +124,753 @@ class TestAmadeusClient:
             assert response.data[0].hotel.hotel_id == "TEST123"
             assert len(response.data[0].offers) == 1
             assert response.data[0].offers[0].price.currency == "USD"
+    
+    def test_offers_request_params_built_once(self):
+        """Test that request query parameters are built once and reused."""
+        check_in = date.today() + timedelta(days=30)
+        request = HotelOffersRequest(
+            hotel_ids=["MCLONGHM", "HILONGHM"],
+            check_in_date=check_in,
+            check_out_date=check_in + timedelta(days=2),
+            currency="EUR",
+        )
+        
+        params = request.as_params
+        assert params["hotelIds"] == "MCLONGHM,HILONGHM"
+        assert params["checkInDate"] == check_in.isoformat()
+        assert params["currency"] == "EUR"
+        assert "boardType" not in params
+        assert request.as_params is params
+    
+    @pytest.mark.asyncio
+    async def test_async_context_manager_closes_http_session(self):
+        """Test that leaving the client's context closes its shared HTTP session."""
+        async with AmadeusClient(api_key="test_key", api_secret="test_secret") as client:
+            assert not client._http.is_closed
+        
+        assert client._http.is_closed
+    
+    @pytest.mark.asyncio
+    async def test_make_request_reuses_access_token(self, client, mock_api):
+        """Test that requests share the session and a single OAuth token."""
+        token_requests = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/v1/security/oauth2/token":
+                token_requests.append(request)
+                return httpx.Response(200, json={"access_token": "abc", "expires_in": 1799})
+            assert request.headers["Authorization"] == "Bearer abc"
+            return httpx.Response(200, json={"data": [], "meta": {}})
+        
+        mock_api(client, handler, handle_token=True)
+        await client.search_hotels_by_location(
+            HotelsListRequest(latitude=40.7128, longitude=-74.0060, radius=5)
+        )
+        await client.search_hotels_by_location(
+            HotelsListRequest(latitude=48.8566, longitude=2.3522, radius=5)
+        )
+        
+        assert len(token_requests) == 1
+        assert token_requests[0].content == b"grant_type=client_credentials&client_id=test_key&client_secret=test_secret"
+        assert client._auth_headers_for("abc") is client._auth_headers
+
+    @pytest.mark.asyncio
+    async def test_access_token_single_flight(self, client, mock_api):
+        """Test that concurrent requests trigger one token fetch, and invalidation forces another."""
+        token_requests = []
+    
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/v1/security/oauth2/token":
+                token_requests.append(request)
+                await asyncio.sleep(0.01)
+                return httpx.Response(200, json={"access_token": "abc", "expires_in": 1799})
+            return httpx.Response(200, json={"data": [], "meta": {}})
+    
+        mock_api(client, handler, handle_token=True)
+        request = HotelsListRequest(latitude=40.7128, longitude=-74.0060, radius=5)
+        await asyncio.gather(*(client.search_hotels_by_location(request) for _ in range(5)))
+        assert len(token_requests) == 1
+    
+        client.invalidate_token()
+        await client.search_hotels_by_location(
+            HotelsListRequest(latitude=48.8566, longitude=2.3522, radius=5)
+        )
+        assert len(token_requests) == 2
+    
+    @pytest.mark.asyncio
+    async def test_revoked_token_is_replaced_on_401(self, client, mock_api):
+        """Test that a 401 evicts the cached token and the request is resent once."""
+        issued = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/v1/security/oauth2/token":
+                issued.append(f"token-{len(issued)}")
+                return httpx.Response(200, json={"access_token": issued[-1], "expires_in": 1799})
+            if request.headers["Authorization"] == "Bearer token-0":
+                return httpx.Response(401, json={"errors": [{"code": 38190, "title": "Invalid access token"}]})
+            return httpx.Response(200, json={"data": [], "meta": {}})
+        
+        mock_api(client, handler, handle_token=True)
+        response = await client._make_request("GET", "/v1/reference-data/locations/hotels/by-geocode")
+        
+        assert response == {"data": [], "meta": {}}
+        assert issued == ["token-0", "token-1"]
+        assert client._token_cache.access_token == "token-1"
+    
+    @pytest.mark.asyncio
+    async def test_background_token_refresh(self, client, monkeypatch, mock_api):
+        """Test that the token is renewed before expiry and the refresher stops on close."""
+        monkeypatch.setattr("src.amadeus_client._TOKEN_REFRESH_MARGIN", 0.15)
+        monkeypatch.setattr("src.amadeus_client._TOKEN_REFRESH_MIN_INTERVAL", 0.01)
+        issued = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            issued.append(f"token-{len(issued)}")
+            return httpx.Response(200, json={"access_token": issued[-1], "expires_in": 0.25})
+        
+        mock_api(client, handler, handle_token=True)
+        client.invalidate_token()
+        client.start_token_refresh()
+        await asyncio.sleep(0.2)
+        
+        assert len(issued) >= 2
+        assert client._token_cache.access_token == issued[-1]
+        assert client._token_cache.is_valid()
+        
+        await client.aclose()
+        assert client._token_refresher is None
+    
+    @pytest.mark.asyncio
+    async def test_background_token_refresh_survives_bad_response(self, client, monkeypatch, mock_api):
+        """Test that a malformed token response doesn't stop the background refresh."""
+        monkeypatch.setattr("src.amadeus_client._TOKEN_REFRESH_RETRY_DELAY", 0.01)
+        responses = [
+            httpx.Response(200, json={"token": "missing-access-token"}),
+            httpx.Response(200, content=b"not json"),
+            httpx.Response(200, json={"access_token": "abc", "expires_in": 1799}),
+        ]
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            return responses.pop(0) if len(responses) > 1 else responses[0]
+        
+        mock_api(client, handler, handle_token=True)
+        client.invalidate_token()
+        client.start_token_refresh()
+        await asyncio.sleep(0.1)
+        
+        assert not client._token_refresher.done()
+        assert client._token_cache.access_token == "abc"
+        await client.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_warm_up_fails_only_on_rejected_credentials(self, client, mock_api):
+        """Test that warm-up raises for bad credentials but tolerates an unavailable API."""
+        status = 500
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(status, json={"error": "invalid_client"})
+        
+        mock_api(client, handler, handle_token=True)
+        client.invalidate_token()
+        await client.warm_up()
+        
+        status = 401
+        with pytest.raises(AmadeusAuthenticationError):
+            await client.warm_up()
+    
+    @pytest.mark.asyncio
+    async def test_warm_up_tolerates_malformed_token_response(self, client, mock_api):
+        """Test that a non-JSON token body is logged by warm-up and raised as an auth error later."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=b"<html>maintenance</html>")
+    
+        mock_api(client, handler, handle_token=True)
+        client.invalidate_token()
+        await client.warm_up()
+    
+        with pytest.raises(AmadeusAuthenticationError) as exc_info:
+            await client._get_access_token()
+        assert exc_info.value.status_code == 200
+    
+    @pytest.mark.asyncio
+    async def test_token_cache_shared_between_clients(self, mock_api):
+        """Test that clients sharing a token cache authenticate only once."""
+        token_requests = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/v1/security/oauth2/token":
+                token_requests.append(request)
+                return httpx.Response(200, json={"access_token": "abc", "expires_in": 1799})
+            return httpx.Response(200, json={"data": [], "meta": {}})
+        
+        token_cache = AmadeusTokenCache()
+        clients = [
+            AmadeusClient(api_key="test_key", api_secret="test_secret", token_cache=token_cache)
+            for _ in range(3)
+        ]
+        for amadeus_client in clients:
+            mock_api(amadeus_client, handler, handle_token=True)
+        request = HotelsListRequest(latitude=40.7128, longitude=-74.0060, radius=5)
+        await asyncio.gather(*(c.search_hotels_by_location(request) for c in clients))
+        
+        assert len(token_requests) == 1
+        assert token_cache.is_valid()
+    
+    def test_token_cache_registry_keyed_by_credentials_and_host(self):
+        """Test that clients with the same key and host get the same token cache."""
+        cache = get_token_cache("key", "https://test.api.amadeus.com")
+        
+        assert get_token_cache("key", "https://test.api.amadeus.com/") is cache
+        assert get_token_cache("key", "https://api.amadeus.com") is not cache
+        assert get_token_cache("other", "https://test.api.amadeus.com") is not cache
+    
+    @pytest.mark.asyncio
+    async def test_geo_cache_and_health_check_memo(self, client, mock_api):
+        """Test that repeated location searches and health checks reuse earlier results."""
+        api_calls = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            api_calls.append(request)
+            return httpx.Response(200, json={"data": [], "meta": {}})
+        
+        mock_api(client, handler)
+        request = HotelsListRequest(latitude=40.7128, longitude=-74.0060, radius=5)
+        await asyncio.gather(*(client.search_hotels_by_location(request) for _ in range(3)))
+        await client.search_hotels_by_locations_concurrent([request])
+        assert len(api_calls) == 1
+        
+        assert client.clear_geo_cache() == 1
+        await client.search_hotels_by_location(request)
+        assert len(api_calls) == 2
+        
+        assert await client.health_check()
+        assert await client.health_check()
+        assert len(api_calls) == 3
+    
+    @pytest.mark.asyncio
+    async def test_search_hotels_by_location_stream(self, client, mock_api):
+        """Test that hotels are parsed incrementally from the streamed response body."""
+        body = (
+            b'{"data": ['
+            b'{"hotelId": "H1", "name": "First", "geoCode": {"latitude": 40.7, "longitude": -74.0}},'
+            b'{"hotelId": "H2", "name": "Second", "geoCode": {"latitude": 40.8, "longitude": -73.9}}'
+            b'], "meta": {"count": 2}}'
+        )
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=body)
+        
+        mock_api(client, handler)
+        request = HotelsListRequest(latitude=40.7128, longitude=-74.0060, radius=5)
+        hotels = [hotel async for hotel in client.search_hotels_by_location_stream(request)]
+        
+        assert [hotel.hotel_id for hotel in hotels] == ["H1", "H2"]
+        assert hotels[1].geo_code.latitude == 40.8
+    
+    @pytest.mark.asyncio
+    async def test_stream_frees_slot_and_shares_rate_limit_backoff(self, client, mock_api):
+        """Test that a paused stream holds no request slot and a 429 pauses other callers."""
+        status = 200
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            if status == 429:
+                return httpx.Response(429, headers={"Retry-After": "5"})
+            return httpx.Response(200, json={"data": [
+                {"hotelId": "H1", "name": "First", "geoCode": {"latitude": 40.7, "longitude": -74.0}},
+            ], "meta": {}})
+        
+        mock_api(client, handler)
+        request = HotelsListRequest(latitude=40.7128, longitude=-74.0060, radius=5)
+        stream = client.search_hotels_by_location_stream(request)
+        await anext(stream)
+        # Every request slot is free while the consumer holds the stream open
+        assert client._request_slots._value == client.max_concurrent_requests
+        await stream.aclose()
+        
+        status = 429
+        with pytest.raises(AmadeusRateLimitError):
+            await anext(client.search_hotels_by_location_stream(request))
+        assert client._backoff_until - time.monotonic() > 4
+    
+    @pytest.mark.asyncio
+    async def test_make_request_rate_limited(self, client, mock_api):
+        """Test that a 429 response is converted to AmadeusRateLimitError."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(
+                429,
+                headers={"Retry-After": "7"},
+                json={"errors": [{"status": 429, "code": 38194, "title": "Too many requests"}]},
+            )
+        
+        client.max_retries = 0
+        mock_api(client, handler)
+        request = HotelsListRequest(latitude=40.7128, longitude=-74.0060, radius=5)
+        with pytest.raises(AmadeusRateLimitError) as exc_info:
+            await client.search_hotels_by_location(request)
+        assert exc_info.value.retry_after == 7
+    
+    def test_retry_after_parsing_and_jittered_backoff(self, client):
+        """Test fractional and HTTP-date Retry-After values and the backoff bounds."""
+        def parse(value):
+            return client._parse_retry_after(httpx.Response(429, headers={"Retry-After": value}))
+        
+        assert parse("1.5") == 1.5
+        assert parse("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse("soon") is None
+        
+        client.retry_jitter = 0.5
+        for attempt in range(6):
+            delay = client._backoff_delay(attempt)
+            cap = min(client.retry_max_delay, client.retry_base_delay * 2 ** attempt)
+            assert cap * 0.5 <= delay <= cap
+        assert client._backoff_delay(0, retry_after=10.0) == 10.0
+    
+    @pytest.mark.asyncio
+    async def test_rate_limited_request_is_retried_with_shared_backoff(self, client, mock_api):
+        """Test that a 429 pauses the client and the request succeeds on retry."""
+        api_calls = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            api_calls.append(request)
+            if len(api_calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "0"})
+            return httpx.Response(200, json={"data": [], "meta": {}})
+        
+        client.retry_base_delay = 0.01
+        mock_api(client, handler)
+        request = HotelsListRequest(latitude=40.7128, longitude=-74.0060, radius=5)
+        response = await client.search_hotels_by_location(request)
+        
+        assert response.data == []
+        assert len(api_calls) == 2
+        assert client._backoff_until > 0
+    
+    @pytest.mark.asyncio
+    async def test_server_errors_are_retried_but_client_errors_are_not(self, client, mock_api):
+        """Test that a 5xx is retried while a 4xx is raised immediately."""
+        statuses = [503, 200, 400]
+        api_calls = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            api_calls.append(request)
+            return httpx.Response(statuses.pop(0), json={"data": [], "meta": {}})
+        
+        client.retry_base_delay = 0.01
+        mock_api(client, handler)
+        response = await client.search_hotels_by_location(
+            HotelsListRequest(latitude=40.7128, longitude=-74.0060, radius=5)
+        )
+        assert response.data == []
+        assert len(api_calls) == 2
+        
+        with pytest.raises(AmadeusAPIError) as exc_info:
+            await client.search_hotels_by_location(
+                HotelsListRequest(latitude=51.5074, longitude=-0.1278, radius=5)
+            )
+        assert exc_info.value.status_code == 400
+        assert len(api_calls) == 3
+    
+    @pytest.mark.asyncio
+    async def test_search_hotels_by_locations_concurrent(self, client, mock_api):
+        """Test that concurrent searches share the HTTP session and failures yield empty results."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.params["latitude"] == "0.0":
+                return httpx.Response(400, json={"errors": [{"status": 400, "code": 477, "title": "INVALID FORMAT"}]})
+            return httpx.Response(200, json={
+                "data": [{"hotelId": "H1", "name": "Hotel", "geoCode": {"latitude": 1.0, "longitude": 2.0}}],
+                "meta": {"count": 1},
+            })
+        
+        mock_api(client, handler)
+        requests = [
+            HotelsListRequest(latitude=40.7128, longitude=-74.0060, radius=5),
+            HotelsListRequest(latitude=0.0, longitude=0.0, radius=5),
+        ]
+        responses = await client.search_hotels_by_locations_concurrent(requests)
+        
+        assert responses[0].data[0].hotel_id == "H1"
+        assert responses[1].data == []
+    
+    @pytest.mark.asyncio
+    async def test_search_hotel_offers_batch_coalesces_requests(self, client, mock_api):
+        """Test that offer requests differing only in hotel IDs share one API call."""
+        offer_calls = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            hotel_ids = request.url.params["hotelIds"].split(",")
+            offer_calls.append(hotel_ids)
+            if "BAD" in hotel_ids and len(hotel_ids) > 1:
+                return httpx.Response(400, json={"errors": [{"status": 400, "code": 1257, "title": "INVALID PROPERTY CODE"}]})
+            return httpx.Response(200, json={"data": [
+                {
+                    "type": "hotel-offers",
+                    "hotel": {"type": "hotel", "hotelId": hotel_id, "name": f"Hotel {hotel_id}"},
+                    "available": True,
+                    "offers": [],
+                }
+                for hotel_id in hotel_ids if hotel_id != "BAD"
+            ]})
+        
+        mock_api(client, handler)
+        check_in = date.today() + timedelta(days=30)
+        check_out = check_in + timedelta(days=2)
+        requests = [
+            HotelOffersRequest(hotel_ids=["H1", "H2"], check_in_date=check_in, check_out_date=check_out),
+            HotelOffersRequest(hotel_ids=["H4"], check_in_date=check_in, check_out_date=check_out + timedelta(days=1)),
+            HotelOffersRequest(hotel_ids=["H2", "H3"], check_in_date=check_in, check_out_date=check_out),
+        ]
+        responses = await client.search_hotel_offers_batch(requests)
+        
+        assert sorted(offer_calls) == [["H1", "H2", "H3"], ["H4"]]
+        assert [item.hotel.hotel_id for item in responses[0].data] == ["H1", "H2"]
+        assert [item.hotel.hotel_id for item in responses[1].data] == ["H4"]
+        assert [item.hotel.hotel_id for item in responses[2].data] == ["H2", "H3"]
+        
+        # A failing coalesced call falls back to one call per request
+        offer_calls.clear()
+        requests = [
+            HotelOffersRequest(hotel_ids=["H1"], check_in_date=check_in, check_out_date=check_out),
+            HotelOffersRequest(hotel_ids=["BAD"], check_in_date=check_in, check_out_date=check_out),
+        ]
+        responses = await client.search_hotel_offers_batch(requests)
+        
+        assert len(offer_calls) == 3
+        assert [item.hotel.hotel_id for item in responses[0].data] == ["H1"]
+        assert responses[1].data == []
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_offer_searches_share_one_call(self, mock_api):
+        """Test that offer searches within the batch window are coalesced."""
+        offer_calls = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            hotel_ids = request.url.params["hotelIds"].split(",")
+            offer_calls.append(hotel_ids)
+            if "BAD" in hotel_ids:
+                return httpx.Response(400, json={"errors": [{"status": 400, "code": 1257, "title": "INVALID PROPERTY CODE"}]})
+            return httpx.Response(200, json={"data": [
+                {"type": "hotel-offers", "hotel": {"type": "hotel", "hotelId": hotel_id, "name": f"Hotel {hotel_id}"}, "available": True, "offers": []}
+                for hotel_id in hotel_ids
+            ]})
+        
+        client = AmadeusClient(api_key="test_key", api_secret="test_secret", max_retries=0, offers_batch_window=0.01)
+        mock_api(client, handler)
+        check_in = date.today() + timedelta(days=30)
+        check_out = check_in + timedelta(days=2)
+        
+        first, second = await asyncio.gather(
+            client.search_hotel_offers(HotelOffersRequest(hotel_ids=["H1"], check_in_date=check_in, check_out_date=check_out)),
+            client.search_hotel_offers(HotelOffersRequest(hotel_ids=["H2"], check_in_date=check_in, check_out_date=check_out)),
+        )
+        assert offer_calls == [["H1", "H2"]]
+        assert [item.hotel.hotel_id for item in first.data] == ["H1"]
+        assert [item.hotel.hotel_id for item in second.data] == ["H2"]
+        
+        # A lone search still reports its own error
+        with pytest.raises(AmadeusAPIError):
+            await client.search_hotel_offers(
+                HotelOffersRequest(hotel_ids=["BAD"], check_in_date=check_in, check_out_date=check_out)
+            )
+    
+    @pytest.mark.asyncio
+    async def test_batch_search_waiting_on_cache_holds_no_slot(self, mock_api):
+        """Test that a batch search sharing an in-flight search doesn't take the slot it needs."""
+        client = AmadeusClient(
+            api_key="test_key",
+            api_secret="test_secret",
+            base_url="https://test.api.amadeus.com",
+            max_concurrent_requests=1,
+        )
+        api_calls = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            api_calls.append(request)
+            return httpx.Response(200, json={"data": [], "meta": {}})
+        
+        mock_api(client, handler)
+        request = HotelsListRequest(latitude=40.7128, longitude=-74.0060, radius=5)
+        
+        await client._request_slots.acquire()
+        interactive = asyncio.create_task(client.search_hotels_by_location(request))
+        await asyncio.sleep(0)
+        batch = asyncio.create_task(client.search_hotels_by_locations_concurrent([request, request]))
+        await asyncio.sleep(0.01)
+        # Only the search that owns the upstream call is queued for a slot
+        assert len(client._request_slots._waiters) == 1
+        
+        client._request_slots.release()
+        await asyncio.wait_for(asyncio.gather(interactive, batch), timeout=1)
+        assert len(api_calls) == 1
+        await client.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_gather_bounded_limits_concurrency(self, client):
+        """Test that fan-out never exceeds max_concurrent_requests."""
+        client._request_slots = PrioritySemaphore(2)
+        in_flight = 0
+        peak = 0
+        
+        async def fake_call(i):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if i == 3:
+                raise AmadeusAPIError("boom")
+            return i
+        
+        results = await client._gather_bounded([fake_call(i) for i in range(6)])
+        
+        assert peak == 2
+        assert results[:3] == [0, 1, 2]
+        assert isinstance(results[3], AmadeusAPIError)
+
+
+class TestRequestModels:
+    """Test cases for request model validation."""
+    
+    def test_enum_fields_are_checked(self):
+        """Test that enumerated request fields reject unknown values."""
+        with pytest.raises(ValueError):
+            HotelsListRequest(latitude=40.7128, longitude=-74.0060, radius_unit="YARD")
+        with pytest.raises(ValueError):
+            HotelsListRequest(latitude=40.7128, longitude=-74.0060, ratings=["5", "6"])
+        with pytest.raises(ValueError):
+            HotelOffersRequest(
+                hotel_ids=["HOTEL1"],
+                check_in_date=date.today() + timedelta(days=30),
+                check_out_date=date.today() + timedelta(days=32),
+                payment_policy="CASH",
+            )
+    
+    def test_empty_board_type_means_no_filter(self):
+        """Test that an empty board type is dropped from the query."""
+        request = HotelOffersRequest(
+            hotel_ids=["HOTEL1"],
+            check_in_date=date.today() + timedelta(days=30),
+            check_out_date=date.today() + timedelta(days=32),
+            board_type="",
+        )
+        assert request.board_type is None
+        assert "boardType" not in request.as_params
+
+
+class TestAmadeusCache:
+    """Test cases for AmadeusCache."""
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        cache = ThreadSafeCache(max_size=2, default_ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        
+        cache.set("c", 3)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.size() == 2
+    
+    def test_cache_key_uses_request_params(self):
+        """Test that equal requests share a readable key that pattern invalidation can match."""
+        cache = AmadeusCache(max_size=10, default_ttl=60)
+        paris = HotelsListRequest(latitude=48.8566, longitude=2.3522, radius=5)
+        
+        key = cache._get_cache_key("search_hotels_by_location", paris)
+        assert key == cache._get_cache_key(
+            "search_hotels_by_location", HotelsListRequest(latitude=48.8566, longitude=2.3522, radius=5)
+        )
+        assert key != cache._get_cache_key(
+            "search_hotels_by_location", HotelsListRequest(latitude=48.8566, longitude=2.3522, radius=10)
+        )
+        
+        cache.cache.set(key, "hotels")
+        assert cache.invalidate_pattern("search_hotels_by_location") == 1
+    
+    @pytest.mark.asyncio
+    async def test_get_or_set_single_flight(self):
+        """Test that concurrent misses for the same key share one upstream call."""
+        cache = AmadeusCache(max_size=10, default_ttl=60)
+        calls = 0
+        
+        async def fetch(request):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"request": request}
+        
+        results = await asyncio.gather(*(cache.get_or_set("fetch", fetch, "paris") for _ in range(5)))
+        
+        assert calls == 1
+        assert all(result == {"request": "paris"} for result in results)
+        assert cache.stats()["hit_count"] == 4
+        assert cache.stats()["miss_count"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_stale_hit_refreshes_in_background(self):
+        """Test that a stale entry is served while one refresh runs, and empty results get a short TTL."""
+        cache = AmadeusCache(max_size=10, default_ttl=60, stale_ratio=0.5, negative_ttl=5)
+        versions = iter(["v1", "v2"])
+        
+        async def fetch(request):
+            return next(versions)
+        
+        assert await cache.get_or_set("fetch", fetch, "nice") == "v1"
+        key = cache._get_cache_key("fetch", "nice")
+        cache.cache._cache[key].timestamp -= 40
+        
+        assert await cache.get_or_set("fetch", fetch, "nice") == "v1"
+        await asyncio.gather(*cache._refreshing.values())
+        assert await cache.get_or_set("fetch", fetch, "nice") == "v2"
+        
+        async def empty(request):
+            return []
+        
+        await cache.get_or_set("empty", empty, "nowhere")
+        assert cache.cache.get_entry(cache._get_cache_key("empty", "nowhere")).ttl == 5
+    
+    @pytest.mark.asyncio
+    async def test_get_or_set_shares_failures_and_survives_cancellation(self):
+        """Test that waiters share an in-flight error and retry if the caller was cancelled."""
+        cache = AmadeusCache(max_size=10, default_ttl=60)
+        calls = 0
+        
+        async def failing(request):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise AmadeusAPIError("upstream down", 503)
+        
+        results = await asyncio.gather(
+            *(cache.get_or_set("fetch", failing, "rome") for _ in range(3)), return_exceptions=True
+        )
+        assert calls == 1
+        assert all(isinstance(result, AmadeusAPIError) for result in results)
+        
+        async def slow(request):
+            await asyncio.sleep(0.05)
+            return request
+        
+        leader = asyncio.create_task(cache.get_or_set("fetch", slow, "oslo"))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_set("fetch", slow, "oslo"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        
+        assert await waiter == "oslo"
+
+
+class TestPrioritySemaphore:
+    """Test cases for PrioritySemaphore."""
+    
+    @pytest.mark.asyncio
+    async def test_interactive_waiters_jump_batch_queue(self):
+        """Test that a freed slot goes to an interactive waiter before earlier batch waiters."""
+        slots = PrioritySemaphore(1, aging_seconds=0)
+        order = []
+        
+        async def worker(name, priority):
+            async with slots.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0)
+        
+        await slots.acquire()
+        tasks = [
+            asyncio.create_task(worker("batch-1", PRIORITY_BATCH)),
+            asyncio.create_task(worker("batch-2", PRIORITY_BATCH)),
+        ]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(worker("interactive", PRIORITY_INTERACTIVE)))
+        await asyncio.sleep(0)
+        slots.release()
+        await asyncio.gather(*tasks)
+        
+        assert order == ["interactive", "batch-1", "batch-2"]
+    
+    @pytest.mark.asyncio
+    async def test_aging_prevents_batch_starvation(self):
+        """Test that a long-waiting batch request overtakes a fresh interactive one."""
+        slots = PrioritySemaphore(1, aging_seconds=0.001)
+        order = []
+        
+        async def worker(name, priority):
+            async with slots.slot(priority):
+                order.append(name)
+        
+        await slots.acquire()
+        batch = asyncio.create_task(worker("batch", PRIORITY_BATCH))
+        await asyncio.sleep(0.05)
+        interactive = asyncio.create_task(worker("interactive", PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        slots.release()
+        await asyncio.gather(batch, interactive)
+        
+        assert order == ["batch", "interactive"]
+
+
+class TestAsyncTokenBucket:
+    """Test cases for the adaptive client-side rate limiter."""
+    
+    @pytest.mark.asyncio
+    async def test_paces_requests_beyond_capacity(self):
+        """Test that acquires beyond the burst capacity wait for refill."""
+        bucket = AsyncTokenBucket(50, capacity=1)
+        loop = asyncio.get_running_loop()
+        
+        started = loop.time()
+        for _ in range(3):
+            async with bucket:
+                pass
+        
+        # First token is free, the other two need 1/50s each
+        assert loop.time() - started >= 0.035
+    
+    def test_halves_on_rate_limit_and_ramps_back(self):
+        """Test multiplicative decrease and additive increase of the rate."""
+        bucket = AsyncTokenBucket(8)
+        
+        bucket.on_rate_limited()
+        bucket.on_rate_limited()
+        assert bucket.rate == 2
+        
+        # No increase within the cooldown second
+        bucket.on_success()
+        assert bucket.rate == 2
+        
+        bucket._last_adjusted_at -= 1.0
+        bucket.on_success()
+        assert bucket.rate == 3
+
+
+class TestMicroBatcher:
+    """Test cases for the micro-batcher."""
+    
+    @pytest.mark.asyncio
+    async def test_groups_items_within_window(self):
+        """Test that items are flushed per key and errors fail only their caller."""
+        flushed = []
+        
+        async def flush(items):
+            flushed.append(sorted(items))
+            return [ValueError(item) if item == 3 else item * 10 for item in items]
+        
+        batcher = MicroBatcher(flush, window=0.01, max_items=10, key=lambda item: item % 2)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(1, 5)), return_exceptions=True)
+        
+        assert sorted(flushed) == [[1, 3], [2, 4]]
+        assert results[0] == 10 and results[1] == 20 and results[3] == 40
+        assert isinstance(results[2], ValueError)
+    
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_early(self):
+        """Test that a batch reaching max_items does not wait for the window."""
+        async def flush(items):
+            return items
+        
+        batcher = MicroBatcher(flush, window=10, max_items=2)
+        assert await asyncio.wait_for(asyncio.gather(batcher.submit(1), batcher.submit(2)), 1) == [1, 2]
 
 
 class TestAmadeusHotelsTools:
@@ -110,6 +886,56 @@ class TestAmadeusHotelsTools:
             mock_settings.return_value.max_retries = 3
             return AmadeusHotelsTools()
     
+    @pytest.mark.asyncio
+    async def test_location_search_cached_once(self, mock_api):
+        """Test that hotel lists are not cached by the tools when the client caches them."""
+        client = AmadeusClient(
+            api_key="test_key",
+            api_secret="test_secret",
+            base_url="https://test.api.amadeus.com"
+        )
+        api_calls = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            api_calls.append(request)
+            return httpx.Response(200, json={"data": [], "meta": {}})
+        
+        mock_api(client, handler)
+        with patch('src.tools.get_app_settings') as mock_settings, \
+                patch('src.tools.get_amadeus_client', return_value=client):
+            mock_settings.return_value.enable_caching = True
+            mock_settings.return_value.cache_max_size = 100
+            mock_settings.return_value.cache_ttl = 300
+            mock_settings.return_value.cache_stale_ratio = 0.8
+            mock_settings.return_value.cache_negative_ttl = 0
+            tools = AmadeusHotelsTools()
+        
+        for _ in range(2):
+            await tools.search_hotels_by_location(latitude=40.7128, longitude=-74.0060, radius=5)
+        
+        assert len(api_calls) == 1
+        assert tools.cache.cache.size() == 0
+        stats = json.loads(await tools.get_cache_stats())
+        assert stats["hotel_list_cache"]["hit_count"] == 1
+        await client.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_cache_stats_report_client_hotel_list_cache(self):
+        """Test that cache stats cover the client's hotel list cache when the tools cache is off."""
+        client = AmadeusClient(api_key="test_key", api_secret="test_secret")
+        with patch('src.tools.get_app_settings') as mock_settings, \
+                patch('src.tools.get_amadeus_client', return_value=client):
+            mock_settings.return_value.enable_caching = False
+            tools = AmadeusHotelsTools()
+    
+        stats = json.loads(await tools.get_cache_stats())
+        assert stats["cache_enabled"] is False
+        assert stats["hotel_list_cache"]["size"] == 0
+    
+        client._geo_cache = None
+        assert await tools.get_cache_stats() == "Cache is disabled"
+        await client.aclose()
+    
     @pytest.mark.asyncio
     async def test_search_hotels_by_location_tool(self, tools):
         """Test the search_hotels_by_location tool."""
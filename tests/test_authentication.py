@@ -32,6 +32,15 @@ class TestSimpleTokenVerifier:
         assert access_token.token == "test-key-1"
         assert access_token.client_id.startswith("user_")
     
+    @pytest.mark.asyncio
+    async def test_verify_reuses_access_token(self, verifier):
+        """Test that repeated verification of a key returns the same AccessToken."""
+        first = await verifier.verify_token("test-key-1")
+        second = await verifier.verify_token("test-key-1")
+        assert first is second
+        assert first.scopes == ["api_access"]
+        assert first.expires_at is None
+    
     @pytest.mark.asyncio
     async def test_verify_invalid_token(self, verifier):
         """Test verification of an invalid token."""
@@ -162,6 +171,26 @@ class TestConditionalAuthMiddleware:
         )
         assert response.status_code == 401
     
+    def test_authenticated_user_in_scope(self, auth_backend):
+        """Test that a bearer token, in any letter case, puts the SDK's user and credentials in scope."""
+        async def whoami(request):
+            return JSONResponse({
+                "client_id": request.user.access_token.client_id,
+                "scopes": request.auth.scopes,
+            })
+        
+        app = Starlette(routes=[Route("/whoami", whoami)])
+        app.add_middleware(ConditionalAuthMiddleware, auth_backend=auth_backend)
+        client = TestClient(app)
+        
+        response = client.get("/whoami", headers={"Authorization": "bearer valid-api-key"})
+        assert response.status_code == 200
+        assert response.json()["client_id"].startswith("user_")
+        assert response.json()["scopes"] == ["api_access"]
+        
+        response = client.get("/whoami", headers={"Authorization": "Basic valid-api-key"})
+        assert response.status_code == 401
+    
     def test_options_request_allowed(self, test_app):
         """Test that OPTIONS requests are allowed without authentication."""
         client = TestClient(test_app)
@@ -141,6 +141,29 @@ class TestServerAuthentication:
             headers={"Authorization": "Bearer invalid-key"}
         )
         assert response.status_code == 401
+    
+    def test_build_asgi_app(self, mock_settings):
+        """Test that the importable ASGI app enforces authentication on /mcp."""
+        from src.main import build_asgi_app
+        
+        mock_settings.redis_url = None
+        mock_settings.stateless_http = False
+        mock_settings.event_store_max_events = 100
+        mock_settings.json_response = False
+        mock_settings.warm_up_on_startup = False
+        mock_settings.token_refresh_in_background = False
+        
+        with TestClient(build_asgi_app()) as client:
+            # CORS preflight is public
+            response = client.options(
+                "/mcp/",
+                headers={"Origin": "https://example.com", "Access-Control-Request-Method": "POST"},
+            )
+            assert response.status_code == 200
+            assert response.headers["access-control-allow-origin"] == "*"
+            
+            response = client.post("/mcp/", json={})
+            assert response.status_code == 401
 
 
 class TestAuthenticationConfiguration:
@@ -173,6 +196,130 @@ class TestAuthenticationConfiguration:
         assert response.status_code != 401 or response.status_code == 404
 
 
+class TestInMemoryEventStore:
+    """Tests for stream resumability storage."""
+    
+    @staticmethod
+    def _message(request_id):
+        import mcp.types as types
+        return types.JSONRPCMessage(types.JSONRPCRequest(jsonrpc="2.0", id=request_id, method="ping"))
+    
+    @pytest.mark.asyncio
+    async def test_replay_after_event(self):
+        """Test that only later events of the same stream are replayed."""
+        from src.main import InMemoryEventStore
+        
+        store = InMemoryEventStore()
+        priming_id = await store.store_event("1", None)
+        first_id = await store.store_event("1", self._message(1))
+        await store.store_event("2", self._message(2))
+        second_id = await store.store_event("1", self._message(3))
+        
+        replayed = []
+        
+        async def send(event):
+            replayed.append(event.event_id)
+        
+        assert await store.replay_events_after(priming_id, send) == "1"
+        assert replayed == [first_id, second_id]
+        
+        replayed.clear()
+        assert await store.replay_events_after("unknown", send) is None
+        assert replayed == []
+    
+    @pytest.mark.asyncio
+    async def test_replay_while_events_are_stored(self):
+        """Test that events stored during a replay don't break it."""
+        from src.main import InMemoryEventStore
+        
+        store = InMemoryEventStore(max_events_per_stream=3)
+        first_id = await store.store_event("1", self._message(1))
+        second_id = await store.store_event("1", self._message(2))
+        third_id = await store.store_event("1", self._message(3))
+        
+        replayed = []
+        
+        async def send(event):
+            replayed.append(event.event_id)
+            await store.store_event("1", self._message(len(replayed) + 3))
+        
+        assert await store.replay_events_after(first_id, send) == "1"
+        assert replayed == [second_id, third_id]
+    
+    @pytest.mark.asyncio
+    async def test_bounded_history(self):
+        """Test that old events and streams are evicted."""
+        from src.main import InMemoryEventStore
+        
+        store = InMemoryEventStore(max_events_per_stream=2, max_streams=2)
+        evicted_id = await store.store_event("1", self._message(1))
+        kept_id = await store.store_event("1", self._message(2))
+        last_id = await store.store_event("1", self._message(3))
+        
+        replayed = []
+        
+        async def send(event):
+            replayed.append(event.event_id)
+        
+        assert await store.replay_events_after(evicted_id, send) is None
+        assert await store.replay_events_after(kept_id, send) == "1"
+        assert replayed == [last_id]
+        
+        await store.store_event("2", self._message(4))
+        await store.store_event("3", self._message(5))
+        assert "1" not in store.streams
+        assert kept_id not in store.event_index
+
+
+class _FakeRedisStreams:
+    """Just enough of redis.asyncio.Redis to replay one trimmed stream."""
+    
+    def __init__(self, entries):
+        self.entries = entries
+    
+    async def xrange(self, key, min="-", max="+", count=None):
+        from src.event_store import _entry_id_key
+    
+        if key != "mcp:events:1":
+            return []
+        after = None if min == "-" else _entry_id_key(min.lstrip("("))
+        found = [
+            (entry_id, fields) for entry_id, fields in self.entries
+            if after is None or _entry_id_key(entry_id.decode()) > after
+        ]
+        return found[:count] if count else found
+    
+    
+class TestRedisEventStore:
+    """Tests for Redis-backed stream resumability."""
+    
+    @pytest.mark.asyncio
+    async def test_replay_after_trimmed_event_is_unknown(self, monkeypatch):
+        """Test that an event trimmed from the Redis stream isn't replayed from later events."""
+        import mcp.types as types
+        from src import event_store
+    
+        data = types.JSONRPCMessage(
+            types.JSONRPCRequest(jsonrpc="2.0", id=1, method="ping")
+        ).model_dump_json(by_alias=True, exclude_none=True)
+        redis = _FakeRedisStreams([(b"5-0", {b"data": data}), (b"7-1", {b"data": data})])
+        monkeypatch.setattr(event_store, "aioredis", MagicMock())
+        event_store.aioredis.Redis.from_url.return_value = redis
+        store = event_store.RedisEventStore("redis://localhost")
+    
+        replayed = []
+    
+        async def send(event):
+            replayed.append(event.event_id)
+    
+        assert await store.replay_events_after("1:3-0", send) is None
+        assert await store.replay_events_after("2:5-0", send) is None
+        assert replayed == []
+    
+        assert await store.replay_events_after("1:5-0", send) == "1"
+        assert replayed == ["1:7-1"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
 